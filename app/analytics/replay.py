@@ -0,0 +1,224 @@
+"""
+Replay recorded searches from search_analytics against a running instance.
+
+Export a window of traffic to a file:
+
+    python -m app.analytics.replay --start 2024-05-01T10:00 --end 2024-05-01T11:00 \\
+        --export window.jsonl
+
+Replay it (or read straight from MongoDB by leaving out --input) at twice the
+original rate with up to 32 requests in flight:
+
+    python -m app.analytics.replay --input window.jsonl --target http://localhost:8000 \\
+        --speed 2 --concurrency 32
+"""
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import datetime
+import argparse
+import json
+import math
+import threading
+import time
+import logging
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PATH = '/api/v1/search'
+
+
+def load_events_from_db(db, start, end):
+    """
+    Read recorded search events in [start, end) ordered by timestamp
+    """
+    cursor = db['search_analytics'].find(
+        {
+            'timestamp': {'$gte': start, '$lt': end},
+            'query': {'$type': 'string'}
+        },
+        {'_id': 0, 'timestamp': 1, 'query': 1, 'filters': 1, 'results_count': 1}
+    ).sort('timestamp', 1)
+    return list(cursor)
+
+
+def load_events_from_file(path):
+    """
+    Read events exported with --export (one JSON object per line)
+    """
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                event['timestamp'] = datetime.fromisoformat(event['timestamp'])
+                events.append(event)
+    events.sort(key=lambda event: event['timestamp'])
+    return events
+
+
+def export_events(events, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event, default=lambda value: value.isoformat()) + '\n')
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct * len(sorted_values) / 100.0))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _percentiles(sorted_values):
+    return {
+        name: round(percentile(sorted_values, pct), 2) if sorted_values else None
+        for name, pct in (('p50', 50), ('p90', 90), ('p95', 95), ('p99', 99), ('max', 100))
+    }
+
+
+class TrafficReplayer:
+    """
+    Reissue recorded searches preserving their relative timing.
+
+    Latency is measured from each request's scheduled send time, so time
+    spent waiting for a free worker counts; `service_ms` covers the HTTP
+    request alone and `schedule_lag_p99_ms` the wait in between.
+
+    `speed` scales the original inter-arrival gaps (2.0 replays twice as
+    fast); 0 sends everything as fast as `concurrency` allows.
+    """
+
+    def __init__(self, target, speed=1.0, concurrency=16, timeout=10.0):
+        self.url = target.rstrip('/') + SEARCH_PATH
+        self.speed = speed
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.samples = []
+
+    def _session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self, event, scheduled_at):
+        started = time.perf_counter()
+        sample = {
+            'query': event['query'],
+            'lag_ms': (started - scheduled_at) * 1000,
+            'recorded_count': event.get('results_count'),
+            'status': None,
+            'count': None,
+            'error': None
+        }
+        try:
+            response = self._session().post(
+                self.url,
+                json={'query': event['query'], 'filters': event.get('filters') or {}},
+                timeout=self.timeout
+            )
+            sample['status'] = response.status_code
+            if response.ok:
+                sample['count'] = response.json().get('total')
+        except (requests.RequestException, ValueError) as e:
+            sample['error'] = str(e)
+        finished = time.perf_counter()
+        # Latency as a client would see it, including time queued for a
+        # worker; service time is the request alone
+        sample['latency_ms'] = (finished - scheduled_at) * 1000
+        sample['service_ms'] = (finished - started) * 1000
+
+        with self._lock:
+            self.samples.append(sample)
+
+    def run(self, events):
+        """
+        Replay events and return the report
+        """
+        if not events:
+            return self.report(0.0)
+
+        first = events[0]['timestamp']
+        begin = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for event in events:
+                offset = (event['timestamp'] - first).total_seconds()
+                scheduled_at = begin + (offset / self.speed if self.speed > 0 else 0)
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._send, event, scheduled_at)
+        return self.report(time.perf_counter() - begin)
+
+    def report(self, duration, max_diffs=20):
+        """
+        Summarize latency percentiles, errors and result-count differences
+        """
+        latencies = sorted(sample['latency_ms'] for sample in self.samples)
+        service_times = sorted(sample['service_ms'] for sample in self.samples)
+        lags = sorted(sample['lag_ms'] for sample in self.samples)
+        diffs = [sample for sample in self.samples
+                 if sample['count'] is not None and sample['recorded_count'] is not None
+                 and sample['count'] != sample['recorded_count']]
+
+        return {
+            'requests': len(self.samples),
+            'duration_s': round(duration, 3),
+            'throughput_rps': round(len(self.samples) / duration, 2) if duration else None,
+            'errors': sum(1 for sample in self.samples if sample['error']),
+            'status_codes': dict(Counter(sample['status'] for sample in self.samples if sample['status'])),
+            'latency_ms': _percentiles(latencies),
+            'service_ms': _percentiles(service_times),
+            'schedule_lag_p99_ms': round(percentile(lags, 99), 2) if lags else None,
+            'result_count_diffs': len(diffs),
+            'result_count_diff_examples': [{
+                'query': sample['query'],
+                'recorded': sample['recorded_count'],
+                'replayed': sample['count']
+            } for sample in diffs[:max_diffs]]
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded search traffic')
+    parser.add_argument('--input', help='Exported JSONL file to replay instead of MongoDB')
+    parser.add_argument('--start', type=datetime.fromisoformat, help='Window start (UTC, ISO format)')
+    parser.add_argument('--end', type=datetime.fromisoformat, help='Window end (UTC, ISO format)')
+    parser.add_argument('--export', help='Write the window to this JSONL file and exit')
+    parser.add_argument('--target', default='http://localhost:8000', help='Base URL of the instance under test')
+    parser.add_argument('--speed', type=float, default=1.0, help='Rate multiplier; 0 replays as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds')
+    parser.add_argument('--limit', type=int, help='Replay at most this many events')
+    args = parser.parse_args()
+
+    if args.input:
+        events = load_events_from_file(args.input)
+    else:
+        if not args.start or not args.end:
+            parser.error('--start and --end are required when reading from MongoDB')
+        from ..database.mongodb import get_db
+        events = load_events_from_db(get_db(), args.start, args.end)
+
+    if args.limit:
+        events = events[:args.limit]
+
+    if args.export:
+        export_events(events, args.export)
+        logger.info(f"Exported {len(events)} events to {args.export}")
+        return
+
+    logger.info(f"Replaying {len(events)} searches against {args.target}")
+    replayer = TrafficReplayer(args.target, args.speed, args.concurrency, args.timeout)
+    print(json.dumps(replayer.run(events), indent=2))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -4,6 +4,27 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def popular_searches_pipeline(time_range=None, limit=10):
+    """
+    Aggregation pipeline for the most popular searches within time range
+    """
+    match_stage = {'query': {'$type': 'string'}}
+    if time_range:
+        match_stage['timestamp'] = {
+            '$gte': datetime.utcnow() - time_range
+        }
+    
+    return [
+        {'$match': match_stage},
+        {'$group': {
+            '_id': '$query',
+            'count': {'$sum': 1},
+            'avg_results': {'$avg': '$results_count'}
+        }},
+        {'$sort': {'count': -1}},
+        {'$limit': limit}
+    ]
+
 class SearchAnalytics:
     def __init__(self):
         self.db = get_db()
@@ -63,23 +84,7 @@ class SearchAnalytics:
         Get most popular searches within time range
         """
         try:
-            match_stage = {}
-            if time_range:
-                match_stage['timestamp'] = {
-                    '$gte': datetime.utcnow() - time_range
-                }
-            
-            pipeline = [
-                {'$match': match_stage},
-                {'$group': {
-                    '_id': '$query',
-                    'count': {'$sum': 1},
-                    'avg_results': {'$avg': '$results_count'}
-                }},
-                {'$sort': {'count': -1}},
-                {'$limit': limit}
-            ]
-            
+            pipeline = popular_searches_pipeline(time_range, limit)
             results = list(self.collection.aggregate(pipeline))
             return results
             
@@ -0,0 +1,108 @@
+"""
+Request handling shared by the Flask app (app.main) and the asyncio app
+(app.async_main), so both serve identical responses.
+"""
+import nltk
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+from datetime import timedelta
+
+from app.utils.deadline import Deadline, DEFAULT_TIMEOUT_MS
+
+# Download required NLTK data
+try:
+    nltk.data.find('tokenizers/punkt')
+    nltk.data.find('corpora/stopwords')
+except LookupError:
+    nltk.download('punkt')
+    nltk.download('stopwords')
+
+SEARCH_LIMIT = 20
+MAX_SUGGESTIONS = 20
+MAX_ANALYTICS_RESULTS = 100
+
+SEARCH_PROJECTION = {
+    'TITLE': 1,
+    'PRODUCT_TYPE_ID': 1,
+    'overall_rating': 1,
+    'prices': 1,
+    'score': {'$meta': 'textScore'}
+}
+SEARCH_SORT = [('score', {'$meta': 'textScore'})]
+
+HOME = {
+    "status": "online",
+    "message": "Smart Search API is running",
+    "endpoints": {
+        "search": "/api/v1/search [POST]",
+        "suggest": "/api/v1/suggest?q= [GET]",
+        "health": "/api/v1/health [GET]",
+        "analytics": "/api/v1/analytics/popular [GET]",
+        "metrics": "/api/v1/metrics [GET]"
+    },
+    "version": "1.0.0"
+}
+
+def process_query(query):
+    """Process the natural language query"""
+    query = query.lower()
+    tokens = word_tokenize(query)
+    stop_words = set(stopwords.words('english'))
+    keywords = [word for word in tokens if word not in stop_words and word.isalnum()]
+    return keywords
+
+def request_deadline(data):
+    """
+    Deadline for a search request, clamping the client's budget to the server default.
+    Returns None if timeout_ms is not a positive integer.
+    """
+    timeout_ms = data.get('timeout_ms')
+    if timeout_ms is None:
+        return Deadline(DEFAULT_TIMEOUT_MS)
+    if isinstance(timeout_ms, str) and timeout_ms.isdigit():
+        timeout_ms = int(timeout_ms)
+    if isinstance(timeout_ms, bool) or not isinstance(timeout_ms, int) or timeout_ms <= 0:
+        return None
+    return Deadline(min(timeout_ms, DEFAULT_TIMEOUT_MS))
+
+def unavailable_search(keywords):
+    """Degraded empty search response served while the database breaker is open"""
+    return {
+        "results": [],
+        "total": 0,
+        "degraded": True,
+        "status": "success",
+        "debug_info": {
+            "processed_keywords": keywords
+        }
+    }
+
+def format_results(products):
+    """Shape MongoDB documents into search API results"""
+    return [{
+        "title": product.get('TITLE'),
+        "type": product.get('PRODUCT_TYPE_ID'),
+        "price": product.get('prices', {}).get('asins'),
+        "rating": product.get('overall_rating'),
+        "relevance_score": product.get('score', 0)
+    } for product in products]
+
+def analytics_window(args):
+    """Time range and limit for the analytics endpoint from query parameters"""
+    hours = float(args.get('hours', 24))
+    limit = min(int(args.get('limit', 10)), MAX_ANALYTICS_RESULTS)
+    return (timedelta(hours=hours) if hours > 0 else None), limit
+
+def format_popular_searches(rows):
+    """Shape popular search aggregation rows for the analytics endpoint"""
+    return [{
+        "query": row['_id'],
+        "count": row['count'],
+        "avg_results": row.get('avg_results')
+    } for row in rows]
+
+def nltk_status():
+    return {
+        "punkt": nltk.data.find('tokenizers/punkt') is not None,
+        "stopwords": nltk.data.find('corpora/stopwords') is not None
+    }
@@ -0,0 +1,292 @@
+"""
+Asyncio serving mode for the Smart Search API.
+
+Serves the same endpoints and responses as app.main, but on Quart with the
+non-blocking Motor driver, so one process can keep hundreds of searches
+waiting on MongoDB at once. CPU-bound text processing runs on a thread
+pool (ASYNC_CPU_WORKERS) to keep the event loop responsive.
+
+At most ASYNC_MAX_QUERIES MongoDB queries run at once and up to
+ASYNC_MAX_QUERY_QUEUE more wait for a slot; beyond that, or after
+ADMISSION_QUEUE_TIMEOUT_SECONDS, requests are shed with 503 and
+Retry-After like the Flask app's admission control.
+
+    hypercorn app.async_main:app --bind 0.0.0.0:$PORT
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import logging
+import os
+
+from quart import Quart, Response, request
+from quart_cors import cors
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+from app.api import (
+    HOME, SEARCH_LIMIT, MAX_SUGGESTIONS, SEARCH_PROJECTION, SEARCH_SORT,
+    process_query, request_deadline, unavailable_search, format_results, analytics_window, format_popular_searches,
+    nltk_status
+)
+from app.analytics.tracker import popular_searches_pipeline
+from app.utils.response import render_json
+from app.utils.singleflight import AsyncSingleFlight
+from app.utils.admission import AsyncAdmissionController, Overloaded, RETRY_AFTER_SECONDS
+from app.utils.deadline import CircuitBreaker, is_database_failure
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CPU_WORKERS = int(os.getenv('ASYNC_CPU_WORKERS', 4))
+MAX_QUERIES = int(os.getenv('ASYNC_MAX_QUERIES', 64))
+MAX_QUERY_QUEUE = int(os.getenv('ASYNC_MAX_QUERY_QUEUE', 256))
+
+app = cors(Quart(__name__))
+
+# Motor connects lazily, so creating the client here doesn't block
+MONGO_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
+client = AsyncIOMotorClient(MONGO_URI)
+db = client['data_scout']
+products_collection = db['products']
+analytics_collection = client[os.getenv('MONGODB_DB', 'data_scout')]['search_analytics']
+
+cpu_pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix='search-cpu')
+
+# Identical in-flight searches share a single MongoDB query
+search_flight = AsyncSingleFlight()
+
+# Stop running full searches while MongoDB keeps failing or timing out
+search_breaker = CircuitBreaker()
+
+# Shed load beyond a fixed number of running and queued MongoDB queries
+query_admission = AsyncAdmissionController(MAX_QUERIES, MAX_QUERY_QUEUE)
+
+_suggester = None
+_suggester_lock = asyncio.Lock()
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run CPU-bound work on the thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, partial(fn, *args, **kwargs))
+
+
+async def json_response(payload, status=200):
+    """Async counterpart of app.utils.response.json_response"""
+    body, status, headers = render_json(payload, status, request.accept_encodings, request.if_none_match)
+    if status == 304:
+        return Response(b'', status=304, headers=headers)
+    return Response(body, status=status, headers=headers, mimetype='application/json')
+
+
+async def overloaded_response():
+    """Async counterpart of app.utils.admission.overloaded_response"""
+    response = await json_response({
+        "error": "Service overloaded, retry later",
+        "status": "error"
+    }, 503)
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
+
+
+async def get_suggester():
+    """Get the shared suggester; its caches load on the thread pool on first use"""
+    global _suggester
+    if _suggester is None:
+        async with _suggester_lock:
+            if _suggester is None:
+                from app.search.suggest import SearchSuggester
+                _suggester = await run_cpu(SearchSuggester)
+    return _suggester
+
+
+async def run_text_search(search_text, limit, deadline):
+    """Run the MongoDB text search for the given keywords within the deadline"""
+    async with query_admission.slot():
+        cursor = products_collection.find(
+            {"$text": {"$search": search_text}},
+            SEARCH_PROJECTION
+        ).sort(SEARCH_SORT).limit(limit).max_time_ms(deadline.max_time_ms())
+        return await cursor.to_list(length=limit)
+
+
+async def search_once(search_text, limit, deadline):
+    """
+    Run the text search once for every caller sharing it and record the
+    outcome on the breaker. Returns None if the search failed.
+    """
+    try:
+        results = await run_text_search(search_text, limit, deadline)
+    except PyMongoError as e:
+        logger.warning(f"Search query failed within deadline: {str(e)}")
+        # A client's own short deadline running out isn't a database failure
+        if is_database_failure(e, deadline):
+            search_breaker.record_failure()
+        return None
+    search_breaker.record_success()
+    return results
+
+
+@app.route('/')
+async def home():
+    return await json_response(HOME)
+
+
+@app.route('/api/v1/search', methods=['POST'])
+async def search():
+    try:
+        data = await request.get_json()
+        if not data or 'query' not in data:
+            return await json_response({
+                "error": "Missing required field: query",
+                "status": "error"
+            }, 400)
+
+        # Process query
+        query = data['query']
+        keywords = await run_cpu(process_query, query)
+
+        if not keywords:
+            return await json_response({
+                "results": [],
+                "total": 0,
+                "status": "success"
+            }, 200)
+
+        deadline = request_deadline(data)
+        if deadline is None:
+            return await json_response({
+                "error": "Invalid field: timeout_ms must be a positive integer",
+                "status": "error"
+            }, 400)
+
+        # Don't query MongoDB while the breaker is open; only the probe
+        # request let through after the reset window reports back
+        if not search_breaker.allow():
+            return await json_response(unavailable_search(keywords), 200)
+
+        # Perform text search, sharing one execution with identical in-flight
+        # requests that have the same budget
+        search_text = " ".join(keywords)
+        try:
+            results = await search_flight.do(
+                (search_text, deadline.timeout_ms), search_once, search_text, SEARCH_LIMIT, deadline
+            )
+        except Overloaded:
+            return await overloaded_response()
+        if results is None:
+            return await json_response(unavailable_search(keywords), 200)
+
+        # Format results
+        formatted_results = format_results(results)
+
+        return await json_response({
+            "results": formatted_results,
+            "total": len(formatted_results),
+            "degraded": False,
+            "status": "success",
+            "debug_info": {
+                "processed_keywords": keywords
+            }
+        }, 200)
+
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        return await json_response({
+            "error": "Internal server error",
+            "message": str(e),
+            "status": "error"
+        }, 500)
+
+
+@app.route('/api/v1/suggest', methods=['GET'])
+async def suggest():
+    try:
+        partial_query = request.args.get('q', '').strip()
+        if not partial_query:
+            return await json_response({
+                "error": "Missing required parameter: q",
+                "status": "error"
+            }, 400)
+
+        limit = min(int(request.args.get('limit', 5)), MAX_SUGGESTIONS)
+        suggester = await get_suggester()
+        suggestions = await run_cpu(suggester.get_suggestions, partial_query, limit)
+
+        return await json_response({
+            "suggestions": suggestions,
+            "status": "success"
+        }, 200)
+
+    except Exception as e:
+        logger.error(f"Suggest error: {str(e)}")
+        return await json_response({
+            "error": "Internal server error",
+            "message": str(e),
+            "status": "error"
+        }, 500)
+
+
+@app.route('/api/v1/health', methods=['GET'])
+async def health_check():
+    try:
+        # Check MongoDB connection
+        await client.server_info()
+        return await json_response({
+            "status": "healthy",
+            "database": "connected",
+            "app_version": "1.0.0",
+            "nltk_data": nltk_status()
+        }, 200)
+    except Exception as e:
+        return await json_response({
+            "status": "unhealthy",
+            "database": "disconnected",
+            "error": str(e)
+        }, 500)
+
+
+@app.route('/api/v1/analytics/popular', methods=['GET'])
+async def popular_searches():
+    try:
+        time_range, limit = analytics_window(request.args)
+        try:
+            async with query_admission.slot():
+                rows = await analytics_collection.aggregate(popular_searches_pipeline(time_range, limit)).to_list(length=limit)
+        except Overloaded:
+            return await overloaded_response()
+        except PyMongoError as e:
+            # Match SearchAnalytics.get_popular_searches, which returns [] on errors
+            logger.error(f"Error getting popular searches: {str(e)}")
+            rows = []
+
+        return await json_response({
+            "popular_searches": format_popular_searches(rows),
+            "status": "success"
+        }, 200)
+
+    except Exception as e:
+        logger.error(f"Analytics error: {str(e)}")
+        return await json_response({
+            "error": "Internal server error",
+            "message": str(e),
+            "status": "error"
+        }, 500)
+
+
+@app.route('/api/v1/metrics', methods=['GET'])
+async def metrics():
+    return await json_response({
+        "search_coalescing": search_flight.stats(),
+        "search_circuit_breaker": search_breaker.stats(),
+        "admission": query_admission.stats(),
+        "status": "success"
+    }, 200)
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8000))
+    app.run(host='0.0.0.0', port=port)
@@ -1,20 +1,21 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 from pymongo import MongoClient
+from pymongo.errors import PyMongoError
 import logging
 import os
 from dotenv import load_dotenv
-
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
+from app.utils.response import json_response
+from app.utils.singleflight import SingleFlight
+from app.utils.deadline import CircuitBreaker, is_database_failure
+from app.utils.admission import AdmissionController, PRIORITY_INTERACTIVE
+from app.utils.profiling import profiled, get_profile, is_authorized
+from app.api import (
+    HOME, SEARCH_LIMIT, MAX_SUGGESTIONS, SEARCH_PROJECTION, SEARCH_SORT,
+    process_query, request_deadline, unavailable_search, format_results, analytics_window, format_popular_searches,
+    nltk_status
+)
+import threading
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -35,105 +36,240 @@ except Exception as e:
     logger.error(f"Failed to connect to MongoDB: {str(e)}")
     raise
 
-def process_query(query):
-    """Process the natural language query"""
-    query = query.lower()
-    tokens = word_tokenize(query)
-    stop_words = set(stopwords.words('english'))
-    keywords = [word for word in tokens if word not in stop_words and word.isalnum()]
-    return keywords
+# Fan searches out over a partitioned catalog when SEARCH_PARTITIONS is set
+scatter_searcher = None
+if os.getenv('SEARCH_PARTITIONS'):
+    from app.search.scatter import ScatterGatherSearcher, get_partition_collections
+    scatter_searcher = ScatterGatherSearcher(get_partition_collections(client=client))
+    logger.info(f"Scatter-gather search over {len(scatter_searcher.partitions)} partitions")
+
+# Identical in-flight searches share a single MongoDB query
+search_flight = SingleFlight()
+
+# Stop running full searches while MongoDB keeps failing or timing out
+search_breaker = CircuitBreaker()
+
+# Shed load beyond a fixed number of running and queued requests
+admission = AdmissionController()
+
+# Suggestion caches and analytics indexes are set up on first use
+_suggester = None
+_analytics = None
+_lazy_lock = threading.Lock()
+
+def get_suggester():
+    """Get the shared suggester, creating it on first use"""
+    global _suggester
+    if _suggester is None:
+        with _lazy_lock:
+            if _suggester is None:
+                from app.search.suggest import SearchSuggester
+                _suggester = SearchSuggester()
+    return _suggester
+
+def get_analytics():
+    """Get the shared analytics tracker, creating it on first use"""
+    global _analytics
+    if _analytics is None:
+        with _lazy_lock:
+            if _analytics is None:
+                from app.analytics.tracker import SearchAnalytics
+                _analytics = SearchAnalytics()
+    return _analytics
+
+def run_text_search(search_text, limit, deadline):
+    """Run the MongoDB text search for the given keywords within the deadline"""
+    if scatter_searcher is not None:
+        hits, _, _, failed = scatter_searcher.scatter(
+            {"$text": {"$search": search_text}},
+            SEARCH_PROJECTION, SEARCH_SORT, limit, deadline, with_count=False
+        )
+        if failed:
+            logger.warning(f"Partial search results, partitions failed: {', '.join(failed)}")
+        return hits
+    return list(products_collection.find(
+        {"$text": {"$search": search_text}},
+        SEARCH_PROJECTION
+    ).sort(SEARCH_SORT).limit(limit).max_time_ms(deadline.max_time_ms()))
+
+def search_once(search_text, limit, deadline):
+    """
+    Run the text search once for every caller sharing it and record the
+    outcome on the breaker. Returns None if the search failed.
+    """
+    try:
+        results = run_text_search(search_text, limit, deadline)
+    except PyMongoError as e:
+        logger.warning(f"Search query failed within deadline: {str(e)}")
+        # A client's own short deadline running out isn't a database failure
+        if is_database_failure(e, deadline):
+            search_breaker.record_failure()
+        return None
+    search_breaker.record_success()
+    return results
 
 @app.route('/')
 def home():
-    return jsonify({
-        "status": "online",
-        "message": "Smart Search API is running",
-        "endpoints": {
-            "search": "/api/v1/search [POST]",
-            "health": "/api/v1/health [GET]"
-        },
-        "version": "1.0.0"
-    })
+    return json_response(HOME)
 
 @app.route('/api/v1/search', methods=['POST'])
+@admission.admit()
+@profiled
 def search():
     try:
         data = request.get_json()
         if not data or 'query' not in data:
-            return jsonify({
+            return json_response({
                 "error": "Missing required field: query",
                 "status": "error"
-            }), 400
+            }, 400)
 
         # Process query
         query = data['query']
         keywords = process_query(query)
         
         if not keywords:
-            return jsonify({
+            return json_response({
                 "results": [],
                 "total": 0,
                 "status": "success"
-            }), 200
-
-        # Perform text search
-        results = list(products_collection.find(
-            {"$text": {"$search": " ".join(keywords)}},
-            {
-                'TITLE': 1,
-                'PRODUCT_TYPE_ID': 1,
-                'overall_rating': 1,
-                'prices': 1,
-                'score': {'$meta': 'textScore'}
-            }
-        ).sort([('score', {'$meta': 'textScore'})]).limit(20))
+            }, 200)
+
+        deadline = request_deadline(data)
+        if deadline is None:
+            return json_response({
+                "error": "Invalid field: timeout_ms must be a positive integer",
+                "status": "error"
+            }, 400)
+
+        # Don't query MongoDB while the breaker is open; only the probe
+        # request let through after the reset window reports back
+        if not search_breaker.allow():
+            return json_response(unavailable_search(keywords), 200)
+
+        # Perform text search, sharing one execution with identical in-flight
+        # requests that have the same budget
+        search_text = " ".join(keywords)
+        results = search_flight.do(
+            (search_text, deadline.timeout_ms), search_once, search_text, SEARCH_LIMIT, deadline
+        )
+        if results is None:
+            return json_response(unavailable_search(keywords), 200)
 
         # Format results
-        formatted_results = [{
-            "title": product.get('TITLE'),
-            "type": product.get('PRODUCT_TYPE_ID'),
-            "price": product.get('prices', {}).get('asins'),
-            "rating": product.get('overall_rating'),
-            "relevance_score": product.get('score', 0)
-        } for product in results]
-
-        return jsonify({
+        formatted_results = format_results(results)
+
+        return json_response({
             "results": formatted_results,
             "total": len(formatted_results),
+            "degraded": False,
             "status": "success",
             "debug_info": {
                 "processed_keywords": keywords
             }
-        }), 200
+        }, 200)
 
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
-        return jsonify({
+        return json_response({
+            "error": "Internal server error",
+            "message": str(e),
+            "status": "error"
+        }, 500)
+
+@app.route('/api/v1/suggest', methods=['GET'])
+@admission.admit(PRIORITY_INTERACTIVE)
+@profiled
+def suggest():
+    try:
+        partial_query = request.args.get('q', '').strip()
+        if not partial_query:
+            return json_response({
+                "error": "Missing required parameter: q",
+                "status": "error"
+            }, 400)
+
+        limit = min(int(request.args.get('limit', 5)), MAX_SUGGESTIONS)
+        suggestions = get_suggester().get_suggestions(partial_query, limit)
+
+        return json_response({
+            "suggestions": suggestions,
+            "status": "success"
+        }, 200)
+
+    except Exception as e:
+        logger.error(f"Suggest error: {str(e)}")
+        return json_response({
             "error": "Internal server error",
             "message": str(e),
             "status": "error"
-        }), 500
+        }, 500)
 
 @app.route('/api/v1/health', methods=['GET'])
 def health_check():
     try:
         # Check MongoDB connection
         client.server_info()
-        return jsonify({
+        return json_response({
             "status": "healthy",
             "database": "connected",
             "app_version": "1.0.0",
-            "nltk_data": {
-                "punkt": nltk.data.find('tokenizers/punkt') is not None,
-                "stopwords": nltk.data.find('corpora/stopwords') is not None
-            }
-        }), 200
+            "nltk_data": nltk_status()
+        }, 200)
     except Exception as e:
-        return jsonify({
+        return json_response({
             "status": "unhealthy",
             "database": "disconnected",
             "error": str(e)
-        }), 500
+        }, 500)
+
+@app.route('/api/v1/analytics/popular', methods=['GET'])
+def popular_searches():
+    try:
+        time_range, limit = analytics_window(request.args)
+        rows = get_analytics().get_popular_searches(time_range, limit)
+
+        return json_response({
+            "popular_searches": format_popular_searches(rows),
+            "status": "success"
+        }, 200)
+
+    except Exception as e:
+        logger.error(f"Analytics error: {str(e)}")
+        return json_response({
+            "error": "Internal server error",
+            "message": str(e),
+            "status": "error"
+        }, 500)
+
+@app.route('/api/v1/metrics', methods=['GET'])
+def metrics():
+    return json_response({
+        "search_coalescing": search_flight.stats(),
+        "search_circuit_breaker": search_breaker.stats(),
+        "admission": admission.stats(),
+        "status": "success"
+    }, 200)
+
+@app.route('/api/v1/profiles/<profile_id>', methods=['GET'])
+def profile_report(profile_id):
+    if not is_authorized(request.headers.get('X-Profile') or request.args.get('profile')):
+        return json_response({
+            "error": "Not authorized",
+            "status": "error"
+        }, 403)
+
+    report = get_profile(profile_id)
+    if report is None:
+        return json_response({
+            "error": "Profile not found",
+            "status": "error"
+        }, 404)
+
+    return json_response({
+        "profile": report,
+        "status": "success"
+    }, 200)
 
 if __name__ == '__main__':
     # Get port from environment variable or default to 8000
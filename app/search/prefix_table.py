@@ -0,0 +1,213 @@
+"""
+Materialized top-k suggestions for short prefixes.
+
+Build offline and write to a file:
+
+    python -m app.search.prefix_table --output prefix_table.json
+
+then point SUGGEST_PREFIX_TABLE_PATH at it, or let SearchSuggester build the
+table in process. Either way the table is rebuilt every
+SUGGEST_PREFIX_REBUILD_SECONDS.
+"""
+from datetime import datetime
+import argparse
+import heapq
+import json
+import threading
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+MAX_PREFIX_LEN = int(os.getenv('SUGGEST_PREFIX_MAX_LEN', 4))
+TOP_K = int(os.getenv('SUGGEST_PREFIX_TOP_K', 10))
+MAX_ANALYTICS_QUERIES = int(os.getenv('SUGGEST_PREFIX_MAX_QUERIES', 50000))
+
+# Searched terms score 1.0 plus their relative frequency, so catalog
+# entries nobody searched for rank below any of them
+SEARCHED_WEIGHT = 1.0
+CATALOG_WEIGHT = 0.5
+
+
+def normalize_prefix(text):
+    """
+    Normalize text the same way for indexing and lookup
+    """
+    text = re.sub(r'[^a-z0-9\s]', '', str(text).lower())
+    return ' '.join(text.split())
+
+
+def _prefixes(text, max_len):
+    """
+    Prefixes of the whole text and of every word in it, up to max_len chars
+    """
+    seen = set()
+    starts = [0] + [m.end() for m in re.finditer(r'\s', text)]
+    for start in starts:
+        for end in range(start + 1, min(start + max_len, len(text)) + 1):
+            prefix = text[start:end]
+            if prefix not in seen and not prefix.endswith(' '):
+                seen.add(prefix)
+                yield prefix
+
+
+def build_prefix_table(titles, categories, query_counts, max_prefix_len=None, top_k=None):
+    """
+    Map every prefix (up to max_prefix_len chars) to its ranked top-k suggestions.
+
+    Searched terms score SEARCHED_WEIGHT plus their relative frequency (1.0
+    for the most popular query). Titles and categories nobody searched for
+    get CATALOG_WEIGHT, which is lower. A query that equals a title or
+    category is suggested once, as that title or category.
+    """
+    max_prefix_len = max_prefix_len or MAX_PREFIX_LEN
+    top_k = top_k or TOP_K
+
+    query_scores = {}
+    max_count = max(query_counts.values(), default=0)
+    for query, count in query_counts.items():
+        normalized = normalize_prefix(query)
+        if normalized and max_count:
+            query_scores[normalized] = max(query_scores.get(normalized, 0), count / max_count)
+
+    def score(normalized):
+        if normalized in query_scores:
+            return SEARCHED_WEIGHT + query_scores[normalized]
+        return CATALOG_WEIGHT
+
+    candidates = []
+    for title in titles:
+        normalized = normalize_prefix(title)
+        if normalized:
+            candidates.append((normalized, {'type': 'product', 'text': title, 'score': score(normalized)}))
+    for category in categories:
+        normalized = normalize_prefix(category)
+        if normalized:
+            candidates.append((normalized, {'type': 'category', 'text': f'Category: {category}', 'score': score(normalized)}))
+    catalog = {normalized for normalized, _ in candidates}
+    for normalized in query_scores:
+        if normalized not in catalog:
+            candidates.append((normalized, {'type': 'popular', 'text': normalized, 'score': score(normalized)}))
+
+    # Keep a bounded min-heap per prefix; ties prefer shorter text
+    heaps = {}
+    for index, (normalized, suggestion) in enumerate(candidates):
+        rank = (suggestion['score'], -len(suggestion['text']), -index)
+        for prefix in _prefixes(normalized, max_prefix_len):
+            heap = heaps.setdefault(prefix, [])
+            if len(heap) < top_k:
+                heapq.heappush(heap, (rank, suggestion))
+            elif rank > heap[0][0]:
+                heapq.heapreplace(heap, (rank, suggestion))
+
+    return {
+        prefix: [suggestion for _, suggestion in sorted(heap, key=lambda x: x[0], reverse=True)]
+        for prefix, heap in heaps.items()
+    }
+
+
+def load_sources(db):
+    """
+    Read titles, categories and query frequencies from MongoDB
+    """
+    titles = db['products'].distinct('TITLE')
+    categories = db['products'].distinct('PRODUCT_TYPE_ID')
+    pipeline = [
+        {'$match': {'query': {'$type': 'string'}}},
+        {'$group': {'_id': '$query', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1}},
+        {'$limit': MAX_ANALYTICS_QUERIES}
+    ]
+    query_counts = {row['_id']: row['count'] for row in db['search_analytics'].aggregate(pipeline)}
+    return titles, categories, query_counts
+
+
+class PrefixSuggestionTable:
+    """
+    Read-mostly prefix table; rebuilds swap in a new dict atomically
+    """
+
+    def __init__(self, max_prefix_len=None, top_k=None):
+        self.max_prefix_len = max_prefix_len or MAX_PREFIX_LEN
+        self.top_k = top_k or TOP_K
+        self.table = None
+        self.built_at = None
+        self._timer = None
+
+    @property
+    def ready(self):
+        return self.table is not None
+
+    def covers(self, prefix):
+        """
+        Whether the prefix is short enough to be answered from the table
+        """
+        return self.ready and 0 < len(prefix) <= self.max_prefix_len
+
+    def lookup(self, prefix, limit):
+        return self.table.get(prefix, [])[:limit]
+
+    def build(self, titles, categories, query_counts):
+        self.table = build_prefix_table(titles, categories, query_counts, self.max_prefix_len, self.top_k)
+        self.built_at = datetime.utcnow()
+        logger.info(f"Built suggestion prefix table with {len(self.table)} prefixes")
+
+    def build_from_db(self, db):
+        self.build(*load_sources(db))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'max_prefix_len': self.max_prefix_len,
+                'top_k': self.top_k,
+                'built_at': self.built_at.isoformat(),
+                'table': self.table
+            }, f)
+
+    def load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.max_prefix_len = data['max_prefix_len']
+        self.top_k = data['top_k']
+        self.built_at = datetime.fromisoformat(data['built_at'])
+        self.table = data['table']
+        logger.info(f"Loaded suggestion prefix table with {len(self.table)} prefixes from {path}")
+
+    def schedule(self, interval, refresh):
+        """
+        Call refresh() every `interval` seconds on a daemon timer
+        """
+        def run():
+            try:
+                refresh()
+            except Exception as e:
+                logger.error(f"Error rebuilding suggestion prefix table: {str(e)}")
+            self.schedule(interval, refresh)
+
+        self._timer = threading.Timer(interval, run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the suggestion prefix table')
+    parser.add_argument('--output', required=True, help='Path of the JSON table to write')
+    parser.add_argument('--max-prefix-len', type=int, default=MAX_PREFIX_LEN)
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    from ..database.mongodb import get_db
+
+    table = PrefixSuggestionTable(args.max_prefix_len, args.top_k)
+    table.build_from_db(get_db())
+    table.save(args.output)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
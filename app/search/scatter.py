@@ -0,0 +1,319 @@
+"""
+Scatter-gather search over a catalog partitioned across collections.
+
+Partitions are configured with SEARCH_PARTITIONS as a comma-separated list of
+`database.collection` names, e.g.
+
+    SEARCH_PARTITIONS=catalog_0.products,catalog_1.products,catalog_2.products
+
+or passed to ScatterGatherSearcher directly as pymongo collections, which may
+come from different clients. When SEARCH_PARTITIONS is set, app.main serves
+/api/v1/search through ScatterGatherSearcher.scatter.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+import heapq
+import time
+import zlib
+import logging
+import os
+
+from pymongo.errors import PyMongoError, ConnectionFailure, ExecutionTimeout
+
+from ..database.mongodb import MongoDB
+from ..utils.singleflight import SingleFlight
+from ..utils.deadline import CircuitBreaker, is_database_failure
+from .searcher import ProductSearcher
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS = [name.strip() for name in os.getenv('SEARCH_PARTITIONS', '').split(',') if name.strip()]
+PARTITION_TIMEOUT_MS = int(os.getenv('SEARCH_PARTITION_TIMEOUT_MS', 1000))
+# Concurrent scatter-gather searches the partition pool is sized for
+SCATTER_CONCURRENCY = int(os.getenv('SEARCH_SCATTER_CONCURRENCY', 16))
+ALLOW_PARTIAL = os.getenv('SEARCH_ALLOW_PARTIAL', 'true').lower() == 'true'
+
+scatter_flight = SingleFlight()
+scatter_breaker = CircuitBreaker()
+
+
+class PartitionsUnavailable(ConnectionFailure):
+    """
+    Raised when partitions fail within the server's budget and partial
+    results are not allowed
+    """
+
+
+def partition_for(product, partition_count, by='hash'):
+    """
+    Pick the partition a product document belongs to.
+
+    `by='category'` keeps each PRODUCT_TYPE_ID in one partition; `by='hash'`
+    spreads products evenly on their _id.
+    """
+    key = product.get('PRODUCT_TYPE_ID') if by == 'category' else product.get('_id')
+    return zlib.crc32(str(key).encode('utf-8')) % partition_count
+
+
+def get_partition_collections(names=None, client=None):
+    """
+    Resolve `database.collection` names against a client (the default one if not given)
+    """
+    client = client or MongoDB.get_instance().client
+    collections = []
+    for name in names or PARTITIONS:
+        db_name, _, collection_name = name.partition('.')
+        collections.append(client[db_name][collection_name or 'products'])
+    return collections
+
+
+def _field_value(document, field):
+    value = document
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _sort_key(sort_options):
+    """
+    Build a merge key that orders documents like MongoDB's sort.
+
+    Missing values sort first ascending and last descending, as in MongoDB.
+    Sort fields are numeric (prices, rating, text score).
+    """
+    fields = []
+    for field, direction in sort_options:
+        if isinstance(direction, dict):
+            # {'$meta': 'textScore'} is projected as 'score' and sorts descending
+            fields.append(('score', -1))
+        else:
+            fields.append((field, direction))
+
+    def key(document):
+        parts = []
+        for field, direction in fields:
+            value = _field_value(document, field)
+            present = isinstance(value, (int, float))
+            if direction < 0:
+                parts.append((0 if present else 1, -value if present else 0))
+            else:
+                parts.append((1 if present else 0, value if present else 0))
+        return tuple(parts)
+
+    return key
+
+
+class _PartitionTask:
+    """
+    Work for one partition; its timeout starts when a pool thread picks it up
+    """
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+        self.started_at = None
+
+    def __call__(self):
+        self.started_at = time.monotonic()
+        return self.fn(*self.args)
+
+
+class ScatterGatherSearcher(ProductSearcher):
+    """
+    ProductSearcher that fans a query out to every partition concurrently.
+
+    Each partition returns its local top `skip + page_size` hits in sort
+    order, and its match count from a separate task. The hits are k-way
+    merged into the global page and the counts summed. Each task has
+    `partition_timeout_ms`, measured from when it starts running, and the
+    whole gather is bounded by the request deadline. A partition whose hits
+    fail or time out is dropped when `allow_partial` is set, and the result
+    is flagged `partial`; otherwise the search degrades like a failed
+    query. A count that misses its budget only makes the total a lower
+    bound.
+    """
+
+    def __init__(self, collections=None, partition_timeout_ms=None, allow_partial=None,
+                 flight=None, breaker=None, concurrency=None):
+        # Partitions replace the single products collection of the base class
+        self.partitions = collections if collections is not None else get_partition_collections()
+        if not self.partitions:
+            raise ValueError("Scatter-gather search needs at least one partition")
+        self.partition_timeout_ms = partition_timeout_ms or PARTITION_TIMEOUT_MS
+        self.allow_partial = ALLOW_PARTIAL if allow_partial is None else allow_partial
+        self.flight = flight or scatter_flight
+        self.breaker = breaker or scatter_breaker
+        # A find and a count task per partition for each concurrent search
+        self.executor = ThreadPoolExecutor(
+            max_workers=2 * len(self.partitions) * (concurrency or SCATTER_CONCURRENCY),
+            thread_name_prefix='search-partition'
+        )
+
+    def _partition_name(self, collection):
+        return f"{collection.database.name}.{collection.name}"
+
+    def _find_partition(self, collection, search_query, projection, sort_options, limit):
+        """
+        Local top-k hits for one partition
+        """
+        return list(collection.find(
+            search_query,
+            projection
+        ).sort(sort_options).limit(limit).max_time_ms(self.partition_timeout_ms))
+
+    def _count_partition(self, collection, search_query):
+        return collection.count_documents(search_query, maxTimeMS=self.partition_timeout_ms)
+
+    def _gather(self, tasks, deadline):
+        """
+        Wait for submitted tasks until each finishes, exceeds its own
+        timeout or the deadline passes. Returns {future: result} for the
+        tasks that succeeded in time.
+        """
+        timeout = self.partition_timeout_ms / 1000.0
+        deadline_at = time.monotonic() + deadline.remaining_ms() / 1000.0
+        pending = set(tasks)
+        results = {}
+
+        def cutoff(future):
+            started_at = tasks[future].started_at
+            return deadline_at if started_at is None else min(deadline_at, started_at + timeout)
+
+        while pending:
+            finished = {future for future in pending if future.done()}
+            for future in finished:
+                try:
+                    results[future] = future.result()
+                except Exception as e:
+                    logger.warning(f"Partition task failed: {str(e)}")
+            pending -= finished
+
+            now = time.monotonic()
+            expired = {future for future in pending if cutoff(future) <= now}
+            for future in expired:
+                future.cancel()
+            pending -= expired
+            if not pending:
+                break
+
+            wait(pending, timeout=min(cutoff(future) for future in pending) - now,
+                 return_when=FIRST_COMPLETED)
+
+        return results
+
+    def scatter(self, search_query, projection, sort_options, limit, deadline, with_count=True):
+        """
+        Fan a query out to all partitions and k-way merge their hits.
+
+        Returns (hits, total, total_exact, failed_partitions): the global top
+        `limit` documents, the summed match count (a lower bound unless
+        total_exact) and the names of partitions whose hits are missing.
+        Raises PartitionsUnavailable if any partition's hits are missing and
+        partial results are not allowed, or ExecutionTimeout if that is
+        because the caller's shortened deadline ran out.
+        """
+        find_futures = []
+        count_futures = []
+        tasks = {}
+        for collection in self.partitions:
+            task = _PartitionTask(self._find_partition, collection, search_query, projection, sort_options, limit)
+            future = self.executor.submit(task)
+            tasks[future] = task
+            find_futures.append(future)
+
+            count_future = None
+            if with_count:
+                task = _PartitionTask(self._count_partition, collection, search_query)
+                count_future = self.executor.submit(task)
+                tasks[count_future] = task
+            count_futures.append(count_future)
+
+        results = self._gather(tasks, deadline)
+
+        partition_hits = []
+        failed = []
+        total = 0
+        total_exact = with_count
+        for collection, find_future, count_future in zip(self.partitions, find_futures, count_futures):
+            if find_future not in results:
+                failed.append(self._partition_name(collection))
+                total_exact = False
+                continue
+            hits = results[find_future]
+            partition_hits.append(hits)
+            if count_future in results:
+                total += results[count_future]
+            else:
+                # Hits arrived but the count didn't: keep the hits
+                total += len(hits)
+                total_exact = False
+        failed.sort()
+
+        if failed and not self.allow_partial:
+            message = f"Search failed on partitions: {', '.join(failed)}"
+            if self._caller_ran_out(deadline):
+                raise ExecutionTimeout(message)
+            raise PartitionsUnavailable(message)
+
+        # k-way merge of the per-partition sorted hits
+        merged = heapq.merge(*partition_hits, key=_sort_key(sort_options))
+        return list(islice(merged, limit)), total, total_exact, failed
+
+    def _caller_ran_out(self, deadline):
+        """
+        Whether missing partitions are down to the client's own short deadline
+        """
+        return deadline.shortened and deadline.expired()
+
+    def _execute_search(self, processed_query, page, page_size, deadline):
+        """
+        Scatter the query to all partitions and merge their results
+        """
+        try:
+            query_info = processed_query
+            search_query = self._build_search_query(query_info)
+            sort_options = self._get_sort_options(query_info.get('filters', {}))
+            skip = (page - 1) * page_size
+
+            # Don't touch the database while the breaker is open
+            if not self.breaker.allow():
+                return self._unavailable_result(page, page_size)
+
+            try:
+                hits, total, total_exact, failed = self.scatter(
+                    search_query, self._get_projection(), sort_options, skip + page_size, deadline
+                )
+            except PyMongoError as e:
+                logger.warning(str(e))
+                if is_database_failure(e, deadline):
+                    self.breaker.record_failure()
+                return self._unavailable_result(page, page_size)
+
+            if failed:
+                if not self._caller_ran_out(deadline):
+                    self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            results = hits[skip:]
+            total_count = total if total_exact else max(skip + len(results), total)
+
+            enhanced_results = self._enhance_results(results, query_info)
+
+            return {
+                'results': enhanced_results,
+                'total': total_count,
+                'total_exact': total_exact,
+                'degraded': not total_exact,
+                'partial': bool(failed),
+                'failed_partitions': failed,
+                'page': page,
+                'page_size': page_size,
+                'total_pages': (total_count + page_size - 1) // page_size
+            }
+
+        except Exception as e:
+            logger.error(f"Scatter-gather search error: {str(e)}")
+            return None
@@ -1,33 +1,110 @@
 from ..database.mongodb import get_db
 from ..utils.text_utils import calculate_text_similarity
+from ..utils.singleflight import SingleFlight
+from ..utils.deadline import Deadline, CircuitBreaker, is_database_failure
+from pymongo.errors import PyMongoError
+import json
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared by all searchers so duplicate in-flight queries hit MongoDB once
+search_flight = SingleFlight()
+search_breaker = CircuitBreaker()
+
 class ProductSearcher:
-    def __init__(self):
+    def __init__(self, flight=None, breaker=None):
         self.db = get_db()
         self.collection = self.db['products']
+        self.flight = flight or search_flight
+        self.breaker = breaker or search_breaker
+    
+    def search(self, processed_query, page=1, page_size=10, timeout_ms=None):
+        """
+        Search for products using processed query information.
+        Concurrent calls for the same query, filters, page and budget share
+        one execution.
+        
+        The search runs within a `timeout_ms` budget. If the count misses
+        the budget, the hits come back with a lower-bound total
+        (`total_exact` is False) and the result is marked `degraded`. While
+        the database circuit breaker is open, or if the query itself fails,
+        a degraded empty page is returned without querying MongoDB.
+        """
+        deadline = Deadline(timeout_ms)
+        key = self._request_key(processed_query, page, page_size, deadline.timeout_ms)
+        return self.flight.do(key, self._execute_search, processed_query, page, page_size, deadline)
+    
+    def get_coalescing_stats(self):
+        """
+        Get counters for executed and coalesced searches
+        """
+        return self.flight.stats()
+    
+    def _request_key(self, query_info, page, page_size, timeout_ms):
+        """
+        Build a normalized key identifying identical search requests.
+        The budget is part of it so a short client deadline isn't imposed
+        on callers who join the execution.
+        """
+        return json.dumps({
+            'tokens': query_info.get('tokens', []),
+            'attributes': query_info.get('attributes', {}),
+            'filters': query_info.get('filters', {}),
+            'page': page,
+            'page_size': page_size,
+            'timeout_ms': timeout_ms
+        }, sort_keys=True, default=str)
     
-    def search(self, processed_query, page=1, page_size=10):
+    def _execute_search(self, processed_query, page, page_size, deadline):
         """
-        Search for products using processed query information
+        Run the search against MongoDB within the request deadline
         """
         try:
             query_info = processed_query
             search_query = self._build_search_query(query_info)
             sort_options = self._get_sort_options(query_info.get('filters', {}))
+            skip = (page - 1) * page_size
+            
+            # Don't touch the database while the breaker is open; only the
+            # probe request let through after the reset window reports back
+            if not self.breaker.allow():
+                return self._unavailable_result(page, page_size)
             
             # Execute search
-            skip = (page - 1) * page_size
-            cursor = self.collection.find(
-                search_query,
-                self._get_projection()
-            ).sort(sort_options).skip(skip).limit(page_size)
+            try:
+                cursor = self.collection.find(
+                    search_query,
+                    self._get_projection()
+                ).sort(sort_options).skip(skip).limit(page_size).max_time_ms(deadline.max_time_ms())
+                results = list(cursor)
+            except PyMongoError as e:
+                logger.warning(f"Search query failed within deadline: {str(e)}")
+                if is_database_failure(e, deadline):
+                    self.breaker.record_failure()
+                return self._unavailable_result(page, page_size)
+            
+            # Get total count if there is budget left for it
+            total_count = None
+            degraded = False
+            if not deadline.expired():
+                try:
+                    total_count = self.collection.count_documents(
+                        search_query,
+                        maxTimeMS=deadline.max_time_ms()
+                    )
+                    self.breaker.record_success()
+                except PyMongoError as e:
+                    logger.warning(f"Count query failed within deadline: {str(e)}")
+                    if is_database_failure(e, deadline):
+                        self.breaker.record_failure()
             
-            # Get results and total count
-            results = list(cursor)
-            total_count = self.collection.count_documents(search_query)
+            total_exact = total_count is not None
+            if not total_exact:
+                # Lower bound: everything before this page plus the hits we have
+                total_count = skip + len(results)
+                degraded = True
             
             # Enhance results with relevance scoring
             enhanced_results = self._enhance_results(results, query_info)
@@ -35,6 +112,8 @@ class ProductSearcher:
             return {
                 'results': enhanced_results,
                 'total': total_count,
+                'total_exact': total_exact,
+                'degraded': degraded,
                 'page': page,
                 'page_size': page_size,
                 'total_pages': (total_count + page_size - 1) // page_size
@@ -44,6 +123,20 @@ class ProductSearcher:
             logger.error(f"Search error: {str(e)}")
             return None
     
+    def _unavailable_result(self, page, page_size):
+        """
+        Degraded empty page returned when the database can't be queried
+        """
+        return {
+            'results': [],
+            'total': 0,
+            'total_exact': False,
+            'degraded': True,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': 0
+        }
+    
     def _build_search_query(self, query_info):
         """
         Build MongoDB query from processed query information
@@ -63,8 +156,8 @@ class ProductSearcher:
         if attributes.get('color'):
             must_clauses.append({
                 "$or": [
-                    {"TITLE": {"$regex": attributes['color'], "$options": "i"}},
-                    {"BULLET_POINTS": {"$regex": attributes['color'], "$options": "i"}}
+                    {"TITLE": {"$regex": re.escape(attributes['color']), "$options": "i"}},
+                    {"BULLET_POINTS": {"$regex": re.escape(attributes['color']), "$options": "i"}}
                 ]
             })
         
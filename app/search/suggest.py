@@ -1,16 +1,22 @@
 from ..database.mongodb import get_db
 from ..utils.text_utils import preprocess_text, calculate_text_similarity
+from .prefix_table import PrefixSuggestionTable, normalize_prefix
 import logging
+import os
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+PREFIX_TABLE_PATH = os.getenv('SUGGEST_PREFIX_TABLE_PATH')
+PREFIX_REBUILD_SECONDS = float(os.getenv('SUGGEST_PREFIX_REBUILD_SECONDS', 3600))
+
 class SearchSuggester:
     def __init__(self):
         self.db = get_db()
         self.collection = self.db['products']
         self.recent_searches = defaultdict(int)
         self._initialize_cache()
+        self._initialize_prefix_table()
     
     def _initialize_cache(self):
         """
@@ -31,11 +37,37 @@ class SearchSuggester:
         except Exception as e:
             logger.error(f"Error initializing suggestion cache: {str(e)}")
     
+    def _initialize_prefix_table(self):
+        """
+        Load or build the short-prefix table and schedule its rebuilds
+        """
+        self.prefix_table = PrefixSuggestionTable()
+        self._refresh_prefix_table()
+        if PREFIX_REBUILD_SECONDS > 0:
+            self.prefix_table.schedule(PREFIX_REBUILD_SECONDS, self._refresh_prefix_table)
+    
+    def _refresh_prefix_table(self):
+        """
+        Reload the prefix table from file, or rebuild it from the database
+        """
+        try:
+            if PREFIX_TABLE_PATH:
+                self.prefix_table.load(PREFIX_TABLE_PATH)
+            else:
+                self.prefix_table.build_from_db(self.db)
+        except Exception as e:
+            logger.error(f"Error refreshing suggestion prefix table: {str(e)}")
+    
     def get_suggestions(self, partial_query, limit=5):
         """
-        Get search suggestions based on partial query
+        Get search suggestions based on partial query.
+        Short prefixes are answered from the precomputed prefix table.
         """
         try:
+            prefix = normalize_prefix(partial_query)
+            if self.prefix_table.covers(prefix) and limit <= self.prefix_table.top_k:
+                return self.prefix_table.lookup(prefix, limit)
+            
             suggestions = []
             
             # Preprocess the partial query
@@ -0,0 +1,259 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import wraps
+import asyncio
+import heapq
+import itertools
+import threading
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Queued requests block a worker thread while they wait, so gunicorn needs
+# at least MAX_IN_FLIGHT + MAX_QUEUE threads per worker (render.yaml runs 48).
+# With fewer threads gunicorn queues the excess itself and nothing is shed.
+MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', 16))
+MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 32))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_SECONDS', 0.5))
+RETRY_AFTER_SECONDS = int(os.getenv('ADMISSION_RETRY_AFTER_SECONDS', 1))
+
+# Lower value wins
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {
+    'interactive': PRIORITY_INTERACTIVE,
+    'normal': PRIORITY_NORMAL,
+    'batch': PRIORITY_BATCH,
+    'export': PRIORITY_BATCH
+}
+
+
+class _Waiter:
+    def __init__(self, priority, seq):
+        self.priority = priority
+        self.seq = seq
+        self.event = threading.Event()
+        self.admitted = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+    """
+    Bound the number of requests executing and waiting at once.
+
+    Up to `max_in_flight` requests run concurrently and up to `max_queue`
+    more wait for a slot, ordered by priority and then arrival. When the
+    queue is full, a new request replaces the lowest-priority waiter if it
+    outranks it, and is otherwise rejected immediately. Waiters that don't
+    get a slot within `queue_timeout` are rejected as well.
+    """
+
+    def __init__(self, max_in_flight=None, max_queue=None, queue_timeout=None):
+        self.max_in_flight = max_in_flight or MAX_IN_FLIGHT
+        self.max_queue = max_queue if max_queue is not None else MAX_QUEUE
+        self.queue_timeout = queue_timeout if queue_timeout is not None else QUEUE_TIMEOUT_SECONDS
+        self._lock = threading.Lock()
+        self._queue = []
+        self._seq = itertools.count()
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        """
+        Wait for an execution slot; returns False if the request was shed
+        """
+        with self._lock:
+            if self.in_flight < self.max_in_flight and not self._queue:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+
+            waiter = _Waiter(priority, next(self._seq))
+            if len(self._queue) >= self.max_queue:
+                worst = max(self._queue) if self._queue else None
+                if worst is None or not waiter < worst:
+                    self.rejected += 1
+                    return False
+                # Evict the lowest-priority waiter to make room
+                self._queue.remove(worst)
+                heapq.heapify(self._queue)
+                worst.event.set()
+            heapq.heappush(self._queue, waiter)
+
+        waiter.event.wait(self.queue_timeout)
+
+        with self._lock:
+            if waiter.admitted:
+                self.admitted += 1
+                return True
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """
+        Hand the finished request's slot to the best waiter, if any
+        """
+        with self._lock:
+            if self._queue:
+                waiter = heapq.heappop(self._queue)
+                waiter.admitted = True
+                waiter.event.set()
+            else:
+                self.in_flight -= 1
+
+    def admit(self, priority=None):
+        """
+        Decorator for Flask views that sheds load with 503 and Retry-After.
+
+        Without an explicit priority it is read from the X-Request-Priority
+        header (interactive, normal, batch or export).
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                request_priority = priority if priority is not None else priority_from_request()
+                if not self.acquire(request_priority):
+                    return overloaded_response()
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self.release()
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'queued': len(self._queue),
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue
+            }
+
+
+class Overloaded(Exception):
+    """
+    Raised when AsyncAdmissionController sheds a request
+    """
+
+
+class AsyncAdmissionController:
+    """
+    Bound concurrent work on one event loop, e.g. MongoDB queries in the
+    asyncio serving mode.
+
+    Up to `max_in_flight` holders run at once and up to `max_queue` more
+    wait for a slot in arrival order. Waiters that don't get one within
+    `queue_timeout`, and arrivals beyond the queue, are rejected.
+    """
+
+    def __init__(self, max_in_flight=None, max_queue=None, queue_timeout=None):
+        self.max_in_flight = max_in_flight or MAX_IN_FLIGHT
+        self.max_queue = max_queue if max_queue is not None else MAX_QUEUE
+        self.queue_timeout = queue_timeout if queue_timeout is not None else QUEUE_TIMEOUT_SECONDS
+        self._waiters = deque()
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        """
+        Wait for a slot; returns False if the request was shed
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if waiter.done():
+                # The slot was handed over just as the caller went away
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+        if waiter.done():
+            self.admitted += 1
+            return True
+        self._waiters.remove(waiter)
+        waiter.cancel()
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """
+        Hand the slot to the longest waiter, if any
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold a slot for the block; raises Overloaded if shed
+        """
+        if not await self.acquire():
+            raise Overloaded("Too many concurrent requests")
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'queued': len(self._waiters),
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue
+        }
+
+
+def priority_from_request(default=PRIORITY_NORMAL):
+    """
+    Get the request priority from the X-Request-Priority header
+    """
+    from flask import request
+
+    name = request.headers.get('X-Request-Priority', '').strip().lower()
+    return PRIORITY_NAMES.get(name, default)
+
+
+def overloaded_response():
+    """
+    Fast rejection response for shed requests
+    """
+    from .response import json_response
+
+    response = json_response({
+        "error": "Service overloaded, retry later",
+        "status": "error"
+    }, 503)
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
@@ -0,0 +1,167 @@
+"""
+Dictionary-driven product attribute extraction.
+
+The attribute dictionary maps attribute types to the terms that signal them,
+e.g. {"color": ["navy blue", "red"], "brand": ["nike"]}. It is read once from
+the JSON file named by ATTRIBUTE_DICTIONARY_PATH (falling back to a small
+built-in dictionary) and compiled into an Aho-Corasick automaton, so a query
+is scanned once no matter how many terms the dictionary holds.
+"""
+from collections import deque
+import json
+import threading
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTE_DICTIONARY_PATH = os.getenv('ATTRIBUTE_DICTIONARY_PATH')
+
+DEFAULT_ATTRIBUTES = {
+    'color': [
+        'red', 'blue', 'green', 'black', 'white', 'yellow', 'orange', 'purple',
+        'pink', 'brown', 'grey', 'gray', 'silver', 'gold', 'beige', 'navy blue',
+        'sky blue', 'dark green', 'maroon', 'teal'
+    ],
+    'size': [
+        'small', 'medium', 'large', 'extra large', 'extra small', 'xs', 'xl',
+        'xxl', 'xxxl', 'king size', 'queen size', 'one size'
+    ],
+    'material': [
+        'cotton', 'leather', 'wool', 'silk', 'linen', 'polyester', 'denim',
+        'nylon', 'stainless steel', 'aluminium', 'aluminum', 'wood', 'wooden',
+        'glass', 'plastic', 'ceramic', 'bamboo'
+    ],
+    'brand': [
+        'nike', 'adidas', 'puma', 'reebok', 'apple', 'samsung', 'sony', 'lg',
+        'dell', 'hp', 'lenovo', 'asus', 'philips', 'bosch', 'levis', 'ikea'
+    ]
+}
+
+
+def normalize_term(text):
+    return ' '.join(str(text).lower().split())
+
+
+class AttributeMatcher:
+    """
+    Aho-Corasick automaton over the attribute dictionary.
+
+    Matches must sit on word boundaries. Overlapping hits are resolved
+    leftmost-longest, so "navy blue" wins over "blue".
+    """
+
+    def __init__(self, dictionary):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.term_count = 0
+
+        for attribute, terms in dictionary.items():
+            for term in terms:
+                normalized = normalize_term(term)
+                if normalized:
+                    self._add(normalized, attribute)
+        self._build()
+
+    def _add(self, term, attribute):
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append((len(term), attribute, term))
+        self.term_count += 1
+
+    def _build(self):
+        """
+        Compute failure links breadth-first and merge outputs along them
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text):
+        """
+        Return (start, end, attribute, term) hits in text, leftmost-longest
+        """
+        text = normalize_term(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        node = 0
+
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, attribute, term in out[node]:
+                start = index - length + 1
+                end = index + 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (end == len(text) or not text[end].isalnum()):
+                    hits.append((start, end, attribute, term))
+
+        hits.sort(key=lambda hit: (hit[0], hit[0] - hit[1]))
+        selected = []
+        last_end = 0
+        for hit in hits:
+            if hit[0] >= last_end:
+                selected.append(hit)
+                last_end = hit[1]
+        return selected
+
+    def extract(self, text):
+        """
+        Group matched terms by attribute type, in query order
+        """
+        found = {}
+        for _, _, attribute, term in self.find_all(text):
+            terms = found.setdefault(attribute, [])
+            if term not in terms:
+                terms.append(term)
+        return found
+
+
+def load_dictionary(path=None):
+    """
+    Read the attribute dictionary JSON, or the built-in one if no path is set
+    """
+    path = path or ATTRIBUTE_DICTIONARY_PATH
+    if not path:
+        return DEFAULT_ATTRIBUTES
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading attribute dictionary {path}: {str(e)}")
+        return DEFAULT_ATTRIBUTES
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_attribute_matcher():
+    """
+    Get the shared matcher, compiling the dictionary on first use
+    """
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = AttributeMatcher(load_dictionary())
+                logger.info(f"Compiled attribute matcher with {_matcher.term_count} terms")
+    return _matcher
@@ -0,0 +1,127 @@
+import threading
+import logging
+import os
+import time
+
+from pymongo.errors import ConnectionFailure, ExecutionTimeout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_MS = int(os.getenv('SEARCH_TIMEOUT_MS', 2000))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('SEARCH_BREAKER_FAILURES', 5))
+BREAKER_RESET_SECONDS = float(os.getenv('SEARCH_BREAKER_RESET_SECONDS', 30))
+
+
+class Deadline:
+    """
+    Time budget for a single request, measured on the monotonic clock
+    """
+
+    def __init__(self, timeout_ms=None):
+        self.timeout_ms = timeout_ms or DEFAULT_TIMEOUT_MS
+        self.expires_at = time.monotonic() + self.timeout_ms / 1000.0
+
+    def remaining_ms(self):
+        """
+        Milliseconds left in the budget, never negative
+        """
+        return max(0, int((self.expires_at - time.monotonic()) * 1000))
+
+    def expired(self):
+        return self.remaining_ms() <= 0
+
+    @property
+    def shortened(self):
+        """
+        Whether the client asked for less than the server's default budget
+        """
+        return self.timeout_ms < DEFAULT_TIMEOUT_MS
+
+    def max_time_ms(self):
+        """
+        Remaining budget as a MongoDB maxTimeMS value (0 would mean no limit)
+        """
+        return max(1, self.remaining_ms())
+
+
+def is_database_failure(error, deadline):
+    """
+    Whether a failed query should count against the circuit breaker.
+
+    Connection errors always do. A timeout only does if the query had the
+    full server budget: a client's own shortened deadline running out
+    degrades that response alone.
+    """
+    if isinstance(error, ConnectionFailure):
+        return True
+    if isinstance(error, ExecutionTimeout):
+        return not deadline.shortened
+    return False
+
+
+class CircuitBreaker:
+    """
+    Track database failures and short-circuit expensive work while unhealthy.
+
+    After `failure_threshold` consecutive failures the breaker opens. Once
+    `reset_seconds` have passed a single probe request is let through; its
+    outcome closes the breaker again or re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=None, reset_seconds=None):
+        self.failure_threshold = failure_threshold or BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds if reset_seconds is not None else BREAKER_RESET_SECONDS
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """
+        Whether the expensive path may run for this request
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # Let one probe through per reset window; a probe that never
+            # reports back does not wedge the breaker half-open
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker closed")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.OPEN:
+                # Late failures from requests started before the breaker
+                # opened must not push the next probe further out
+                return
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                logger.warning(f"Circuit breaker opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures
+            }
@@ -0,0 +1,227 @@
+"""
+Opt-in profiling of single API requests.
+
+Set PROFILE_TOKEN on the server, then send the same value in the X-Profile
+header (or `profile` query parameter) of a request. Add X-Profile-Memory: 1
+(or `profile_memory=1`) to trace allocations too. The response carries an
+X-Profile-Id header; fetch the report from /api/v1/profiles/<id> with the
+same token. Requests without a valid token skip the profiler entirely, and
+with PROFILE_TOKEN unset the check is a single global lookup.
+
+One request per process is profiled at a time (Python 3.12+ allows only
+one active cProfile profiler); profiled requests arriving meanwhile are
+served unprofiled, without an X-Profile-Id header. Before 3.12 cProfile
+only sees the request's own thread, so work done on the scatter-gather
+partition pool shows up as time spent waiting. From 3.12 it records every
+thread, so the report also includes whatever other requests ran meanwhile.
+"""
+from collections import OrderedDict
+from functools import wraps
+import cProfile
+import hmac
+import json
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 20))
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', 25))
+
+# Time is attributed to these components by source file path. Code outside
+# them (builtins such as socket reads, stdlib helpers) counts towards the
+# component of its callers, so a blocking recv under pymongo is mongo time.
+COMPONENTS = {
+    'nltk': ('nltk',),
+    'mongo': ('pymongo', 'bson'),
+    'fuzz': ('fuzzywuzzy', 'Levenshtein', 'difflib')
+}
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+# Only one cProfile profiler may be active per process on Python 3.12+
+_profiler_lock = threading.Lock()
+# tracemalloc is process-wide, so only one request traces allocations at a time
+_memory_lock = threading.Lock()
+
+
+def is_authorized(token):
+    return bool(PROFILE_TOKEN) and bool(token) and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def _requested_profile(request):
+    """
+    Return (profile, trace_memory) flags for the request
+    """
+    if not PROFILE_TOKEN:
+        return False, False
+    token = request.headers.get('X-Profile') or request.args.get('profile')
+    if not token or not is_authorized(token):
+        return False, False
+    memory = request.headers.get('X-Profile-Memory') or request.args.get('profile_memory')
+    return True, memory in ('1', 'true')
+
+
+def _own_component(filename):
+    for name, markers in COMPONENTS.items():
+        if any(marker in filename for marker in markers):
+            return name
+    return None
+
+
+def _attribution(stats, func, memo):
+    """
+    Share of `func`'s own time per component, as {component: fraction}
+    """
+    if func in memo:
+        return memo[func]
+    component = _own_component(func[0])
+    if component:
+        memo[func] = {component: 1.0}
+        return memo[func]
+
+    # Guard against recursion cycles while resolving the callers
+    memo[func] = {'other': 1.0}
+    callers = stats.stats[func][4]
+    # Split by the time spent in func per caller; fall back to call counts
+    weights = {caller: timing[2] or timing[3] or timing[0] for caller, timing in callers.items()
+               if caller in stats.stats}
+    total = sum(weights.values())
+    if not total:
+        return memo[func]
+
+    shares = {}
+    for caller, weight in weights.items():
+        for name, fraction in _attribution(stats, caller, memo).items():
+            shares[name] = shares.get(name, 0.0) + fraction * weight / total
+    memo[func] = shares
+    return shares
+
+
+def _component_times(stats):
+    totals = {name: 0.0 for name in COMPONENTS}
+    totals['other'] = 0.0
+    memo = {}
+    for func, (_, _, tottime, _, _) in stats.stats.items():
+        for name, fraction in _attribution(stats, func, memo).items():
+            totals[name] += tottime * fraction
+    return {name: round(seconds * 1000, 3) for name, seconds in totals.items()}
+
+
+def _top_functions(stats, limit):
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        'function': f"{filename}:{line}({func})",
+        'calls': calls,
+        'total_ms': round(tottime * 1000, 3),
+        'cumulative_ms': round(cumtime * 1000, 3)
+    } for (filename, line, func), (_, calls, tottime, cumtime, _) in rows]
+
+
+def _top_allocations(snapshot, limit):
+    return [{
+        'location': str(stat.traceback),
+        'size_kb': round(stat.size / 1024, 2),
+        'count': stat.count
+    } for stat in snapshot.statistics('lineno')[:limit]]
+
+
+def _store(report):
+    with _profiles_lock:
+        _profiles[report['id']] = report
+        while len(_profiles) > PROFILE_KEEP:
+            _profiles.popitem(last=False)
+
+    if PROFILE_DIR:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(os.path.join(PROFILE_DIR, f"{report['id']}.json"), 'w', encoding='utf-8') as f:
+                json.dump(report, f)
+        except OSError as e:
+            logger.error(f"Error writing profile {report['id']}: {str(e)}")
+
+
+def get_profile(profile_id):
+    """
+    Look a report up in memory, then in PROFILE_DIR for ones that were
+    evicted or recorded by another worker
+    """
+    with _profiles_lock:
+        report = _profiles.get(profile_id)
+    if report is not None or not PROFILE_DIR:
+        return report
+
+    # Ids are uuid4 hex; anything else must not reach the filesystem
+    if not re.fullmatch(r'[0-9a-f]{32}', profile_id):
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading profile {profile_id}: {str(e)}")
+        return None
+
+
+def profiled(view):
+    """
+    Decorator that profiles the view when the request carries a valid token
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import request, make_response
+
+        profile, trace_memory = _requested_profile(request)
+        if not profile:
+            return view(*args, **kwargs)
+
+        if not _profiler_lock.acquire(blocking=False):
+            logger.info(f"Profiler busy, serving {request.path} unprofiled")
+            return view(*args, **kwargs)
+
+        trace_memory = trace_memory and _memory_lock.acquire(blocking=False)
+        owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        profiler = cProfile.Profile()
+        try:
+            if owns_tracing:
+                tracemalloc.start()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = make_response(view(*args, **kwargs))
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - started
+                snapshot = tracemalloc.take_snapshot() if trace_memory else None
+        finally:
+            _profiler_lock.release()
+            if owns_tracing:
+                tracemalloc.stop()
+            if trace_memory:
+                _memory_lock.release()
+
+        stats = pstats.Stats(profiler)
+        report = {
+            'id': uuid.uuid4().hex,
+            'endpoint': request.path,
+            'method': request.method,
+            'timestamp': time.time(),
+            'wall_ms': round(elapsed * 1000, 3),
+            'components_ms': _component_times(stats),
+            'top_functions': _top_functions(stats, PROFILE_TOP_N),
+            'top_allocations': _top_allocations(snapshot, PROFILE_TOP_N) if snapshot else None
+        }
+        _store(report)
+
+        response.headers['X-Profile-Id'] = report['id']
+        return response
+    return wrapper
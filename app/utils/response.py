@@ -0,0 +1,132 @@
+from datetime import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional at runtime
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional at runtime
+    brotli = None
+
+try:
+    from bson import ObjectId
+except ImportError:  # pragma: no cover - bson ships with pymongo
+    ObjectId = None
+
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('RESPONSE_BROTLI_QUALITY', 5))
+
+
+def _default(obj):
+    """
+    Serialize Mongo types that the JSON encoders don't know about
+    """
+    if ObjectId is not None and isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(payload):
+    """
+    Encode payload to JSON bytes, using orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def make_etag(body, encoding=None):
+    """
+    Build a strong ETag from the uncompressed response body, tagged with
+    the content-coding it is sent in
+    """
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+
+def choose_encoding(accept_encodings, body_size):
+    """
+    Pick a content coding for the response, or None to send it as is.
+
+    `accept_encodings` maps coding names to client quality values. The
+    supported coding with the highest quality wins, preferring br on ties;
+    `*` covers codings the client didn't list.
+    """
+    if body_size < COMPRESS_MIN_BYTES:
+        return None
+
+    def quality(coding):
+        return accept_encodings.get(coding, accept_encodings.get('*', 0))
+
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = max(supported, key=quality)
+    best = quality(encoding)
+    if best <= 0 or accept_encodings.get('identity', 0) > best:
+        return None
+    return encoding
+
+
+def compress(body, encoding):
+    """
+    Compress body with the given content coding
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def render_json(payload, status, accept_encodings, if_none_match):
+    """
+    Build (body, status, headers) for a JSON response.
+
+    `accept_encodings` and `if_none_match` are the request's parsed
+    Accept-Encoding and If-None-Match headers, as exposed by Flask and Quart.
+    """
+    body = encode_json(payload)
+    headers = {'Vary': 'Accept-Encoding'}
+
+    accept = {value: quality for value, quality in accept_encodings}
+    encoding = choose_encoding(accept, len(body))
+
+    if status == 200:
+        # Strong validators must differ per content-coding (RFC 7232)
+        etag = make_etag(body, encoding)
+        headers['ETag'] = etag
+        # If-None-Match uses weak comparison, so W/ tags from caches match too
+        if if_none_match.contains_weak(etag.strip('"')):
+            return b'', 304, headers
+
+    if encoding:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+
+    return body, status, headers
+
+
+def json_response(payload, status=200):
+    """
+    Drop-in replacement for `jsonify(...), status` with compression and ETags
+    """
+    from flask import Response, request
+
+    body, status, headers = render_json(payload, status, request.accept_encodings, request.if_none_match)
+    if status == 304:
+        return Response(status=304, headers=headers)
+    return Response(body, status=status, headers=headers, mimetype='application/json')
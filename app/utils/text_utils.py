@@ -2,6 +2,7 @@ from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from fuzzywuzzy import fuzz
+from .attribute_matcher import get_attribute_matcher
 import nltk
 import re
 
@@ -41,27 +42,35 @@ def calculate_text_similarity(text1, text2):
     """
     return fuzz.ratio(text1.lower(), text2.lower()) / 100.0
 
+# Fields the attribute dictionary may fill; other dictionary types are only
+# listed under 'terms'
+DICTIONARY_ATTRIBUTES = ('color', 'size', 'material', 'brand')
+
+price_pattern = re.compile(r'under\s*\$?(\d+)|less than\s*\$?(\d+)|around\s*\$?(\d+)')
+
 def extract_product_attributes(text):
     """
-    Extract product attributes from text using regex patterns
+    Extract product attributes from text using the attribute dictionary
+    and a price pattern. The first hit of each known type fills its field;
+    every hit is listed under 'terms'.
     """
     attributes = {
         'color': None,
         'size': None,
+        'material': None,
         'price_range': None,
         'brand': None
     }
     
-    # Color detection
-    colors = ['red', 'blue', 'green', 'black', 'white', 'yellow']
-    color_pattern = r'\b(' + '|'.join(colors) + r')\b'
-    color_match = re.search(color_pattern, text.lower())
-    if color_match:
-        attributes['color'] = color_match.group(1)
+    # Dictionary terms, matched in a single pass
+    terms = get_attribute_matcher().extract(text)
+    for attribute in DICTIONARY_ATTRIBUTES:
+        if attribute in terms:
+            attributes[attribute] = terms[attribute][0]
+    attributes['terms'] = terms
     
     # Price range detection
-    price_pattern = r'under\s*\$?(\d+)|less than\s*\$?(\d+)|around\s*\$?(\d+)'
-    price_match = re.search(price_pattern, text.lower())
+    price_match = price_pattern.search(text.lower())
     if price_match:
         price = next(p for p in price_match.groups() if p is not None)
         attributes['price_range'] = float(price)
@@ -0,0 +1,93 @@
+"""
+Attribute extraction throughput: the old per-call regex against the
+compiled AttributeMatcher, and a regex alternation against the automaton as
+the dictionary grows.
+
+Run from the project root:
+
+    python -m benchmarks.bench_attributes
+"""
+import random
+import re
+import string
+import timeit
+
+from app.utils.attribute_matcher import AttributeMatcher, DEFAULT_ATTRIBUTES
+
+QUERIES = [
+    'navy blue nike running shoes under $80',
+    'red cotton t shirt extra large',
+    'stainless steel water bottle',
+    'samsung 55 inch tv less than $600',
+    'wooden coffee table around $150',
+    'black leather wallet for men',
+    'kids yellow raincoat small',
+    'wireless earbuds with charging case'
+]
+
+
+def legacy_extract(text):
+    """
+    extract_product_attributes as it was: six colors, regex built per call
+    """
+    attributes = {'color': None, 'size': None, 'price_range': None, 'brand': None}
+    colors = ['red', 'blue', 'green', 'black', 'white', 'yellow']
+    color_pattern = r'\b(' + '|'.join(colors) + r')\b'
+    color_match = re.search(color_pattern, text.lower())
+    if color_match:
+        attributes['color'] = color_match.group(1)
+    price_pattern = r'under\s*\$?(\d+)|less than\s*\$?(\d+)|around\s*\$?(\d+)'
+    price_match = re.search(price_pattern, text.lower())
+    if price_match:
+        price = next(p for p in price_match.groups() if p is not None)
+        attributes['price_range'] = float(price)
+    return attributes
+
+
+price_pattern = re.compile(r'under\s*\$?(\d+)|less than\s*\$?(\d+)|around\s*\$?(\d+)')
+
+
+def matcher_extract(matcher, text):
+    """
+    Same work extract_product_attributes now does per query
+    """
+    terms = matcher.extract(text)
+    price_pattern.search(text.lower())
+    return terms
+
+
+def synthetic_dictionary(size, seed=7):
+    rng = random.Random(seed)
+    brands = {''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+              for _ in range(size)}
+    dictionary = {key: list(values) for key, values in DEFAULT_ATTRIBUTES.items()}
+    dictionary['brand'] = dictionary['brand'] + sorted(brands)
+    return dictionary
+
+
+def per_query_us(fn, rounds):
+    seconds = timeit.timeit(lambda: [fn(query) for query in QUERIES], number=rounds)
+    return seconds / (rounds * len(QUERIES)) * 1e6
+
+
+def main(rounds=2000):
+    default_matcher = AttributeMatcher(DEFAULT_ATTRIBUTES)
+    print(f"legacy extract (6 colors)        : {per_query_us(legacy_extract, rounds):7.2f} us/query")
+    print(f"matcher extract ({default_matcher.term_count:3d} terms)       : "
+          f"{per_query_us(lambda q: matcher_extract(default_matcher, q), rounds):7.2f} us/query")
+    print()
+
+    for size in (100, 1000, 10000):
+        dictionary = synthetic_dictionary(size)
+        terms = sorted({term for values in dictionary.values() for term in values}, key=len, reverse=True)
+        alternation = re.compile(r'\b(' + '|'.join(re.escape(term) for term in terms) + r')\b')
+        matcher = AttributeMatcher(dictionary)
+
+        regex_us = per_query_us(lambda q: alternation.findall(q.lower()), rounds // 10)
+        matcher_us = per_query_us(matcher.find_all, rounds // 10)
+        print(f"{len(terms):6d} terms  regex alternation: {regex_us:8.2f} us/query   "
+              f"automaton: {matcher_us:6.2f} us/query")
+
+
+if __name__ == '__main__':
+    main()
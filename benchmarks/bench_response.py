@@ -0,0 +1,74 @@
+"""
+Compare the stock `json` encoder with the response layer in app/utils/response.py.
+
+Run from the project root:
+
+    python -m benchmarks.bench_response
+"""
+import gzip
+import json
+import random
+import timeit
+
+from app.utils import response
+
+WORDS = ('cotton', 'slim', 'fit', 'shirt', 'blue', 'wireless', 'charger', 'steel',
+         'water', 'resistant', 'pack', 'premium', 'lightweight', 'durable', 'kids')
+
+
+def build_payload(count=20, seed=42):
+    """
+    Build a search response shaped like ProductSearcher.search output
+    """
+    rng = random.Random(seed)
+
+    def sentence(length):
+        return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+    results = [{
+        'title': sentence(8),
+        'type': rng.randint(1, 5000),
+        'rating': round(rng.uniform(1, 5), 1),
+        'price': round(rng.uniform(5, 500), 2),
+        'bullet_points': [sentence(25) for _ in range(5)],
+        'relevance_score': rng.random(),
+        'text_score': rng.uniform(0, 10)
+    } for _ in range(count)]
+
+    return {
+        'results': results,
+        'total': count * 37,
+        'page': 1,
+        'page_size': count,
+        'total_pages': 37
+    }
+
+
+def main(rounds=2000):
+    payload = build_payload()
+
+    stdlib_body = json.dumps(payload).encode('utf-8')
+    fast_body = response.encode_json(payload)
+
+    stdlib_time = timeit.timeit(lambda: json.dumps(payload).encode('utf-8'), number=rounds)
+    fast_time = timeit.timeit(lambda: response.encode_json(payload), number=rounds)
+
+    print(f"encoder: {'orjson' if response.orjson else 'json (orjson not installed)'}")
+    print(f"serialize stdlib json : {stdlib_time / rounds * 1e6:8.1f} us/response")
+    print(f"serialize response    : {fast_time / rounds * 1e6:8.1f} us/response")
+    print()
+    print(f"bytes stdlib json     : {len(stdlib_body):8d}")
+    print(f"bytes compact         : {len(fast_body):8d}")
+    print(f"bytes gzip            : {len(gzip.compress(fast_body, compresslevel=response.GZIP_LEVEL)):8d}")
+    if response.brotli is not None:
+        print(f"bytes brotli          : {len(response.compress(fast_body, 'br')):8d}")
+
+    gzip_time = timeit.timeit(lambda: response.compress(fast_body, 'gzip'), number=rounds)
+    print(f"gzip cost             : {gzip_time / rounds * 1e6:8.1f} us/response")
+    if response.brotli is not None:
+        br_time = timeit.timeit(lambda: response.compress(fast_body, 'br'), number=rounds)
+        print(f"brotli cost           : {br_time / rounds * 1e6:8.1f} us/response")
+
+
+if __name__ == '__main__':
+    main()
@@ -13,10 +13,21 @@ class Config:
     DEFAULT_PAGE_SIZE = 10
     MAX_PAGE_SIZE = 100
     MIN_SEARCH_CHARS = 2
+    SEARCH_TIMEOUT_MS = int(os.getenv('SEARCH_TIMEOUT_MS', 2000))
+    SEARCH_BREAKER_FAILURES = int(os.getenv('SEARCH_BREAKER_FAILURES', 5))
+    SEARCH_BREAKER_RESET_SECONDS = float(os.getenv('SEARCH_BREAKER_RESET_SECONDS', 30))
+    SEARCH_PARTITIONS = os.getenv('SEARCH_PARTITIONS', '')
+    SEARCH_PARTITION_TIMEOUT_MS = int(os.getenv('SEARCH_PARTITION_TIMEOUT_MS', 1000))
+    SEARCH_SCATTER_CONCURRENCY = int(os.getenv('SEARCH_SCATTER_CONCURRENCY', 16))
+    SEARCH_ALLOW_PARTIAL = os.getenv('SEARCH_ALLOW_PARTIAL', 'true').lower() == 'true'
     
     # Suggestion settings
     MAX_SUGGESTIONS = 5
     SUGGESTION_SIMILARITY_THRESHOLD = 0.3
+    SUGGEST_PREFIX_MAX_LEN = int(os.getenv('SUGGEST_PREFIX_MAX_LEN', 4))
+    SUGGEST_PREFIX_TOP_K = int(os.getenv('SUGGEST_PREFIX_TOP_K', 10))
+    SUGGEST_PREFIX_REBUILD_SECONDS = float(os.getenv('SUGGEST_PREFIX_REBUILD_SECONDS', 3600))
+    SUGGEST_PREFIX_TABLE_PATH = os.getenv('SUGGEST_PREFIX_TABLE_PATH')
     
     # Analytics settings
     MAX_RECENT_SEARCHES = 1000
@@ -24,15 +35,38 @@ class Config:
     # Cache settings
     CACHE_TIMEOUT = 3600  # 1 hour
     
+    # Response settings
+    RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+    RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', 6))
+    RESPONSE_BROTLI_QUALITY = int(os.getenv('RESPONSE_BROTLI_QUALITY', 5))
+    
+    # Admission control settings; gunicorn --threads must be at least
+    # ADMISSION_MAX_IN_FLIGHT + ADMISSION_MAX_QUEUE for requests to be shed
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', 16))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 32))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_SECONDS', 0.5))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv('ADMISSION_RETRY_AFTER_SECONDS', 1))
+    
+    # Async serving settings
+    ASYNC_CPU_WORKERS = int(os.getenv('ASYNC_CPU_WORKERS', 4))
+    ASYNC_MAX_QUERIES = int(os.getenv('ASYNC_MAX_QUERIES', 64))
+    ASYNC_MAX_QUERY_QUEUE = int(os.getenv('ASYNC_MAX_QUERY_QUEUE', 256))
+    
     # API settings
     CORS_ORIGINS = ['http://localhost:3000']  # Add your frontend origins
     
+    # Profiling settings (profiling is disabled unless PROFILE_TOKEN is set)
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+    PROFILE_DIR = os.getenv('PROFILE_DIR')
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 20))
+    
     # Logging settings
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     
     # Text processing settings
     STOP_WORDS_LANGUAGE = 'english'
     MIN_WORD_LENGTH = 2
+    ATTRIBUTE_DICTIONARY_PATH = os.getenv('ATTRIBUTE_DICTIONARY_PATH')
     
     # Search relevance settings
     MIN_RELEVANCE_SCORE = 0.3
@@ -0,0 +1,240 @@
+import asyncio
+import threading
+import time
+
+import flask
+import pytest
+
+from app.utils.admission import (
+    AdmissionController, AsyncAdmissionController, Overloaded,
+    PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BATCH
+)
+
+
+def hold_slots(controller, count):
+    """Take `count` slots; returns an event that releases them when set"""
+    release = threading.Event()
+    ready = threading.Barrier(count + 1)
+
+    def worker():
+        assert controller.acquire()
+        ready.wait()
+        release.wait()
+        controller.release()
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    return release, threads
+
+
+def start_waiter(controller, priority, results, name):
+    def worker():
+        admitted = controller.acquire(priority)
+        results[name] = admitted
+        if admitted:
+            controller.release()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    return thread
+
+
+def wait_for_queue(controller, size, timeout=1.0):
+    end = time.monotonic() + timeout
+    while controller.stats()['queued'] != size and time.monotonic() < end:
+        time.sleep(0.005)
+    assert controller.stats()['queued'] == size
+
+
+def test_admits_up_to_max_in_flight():
+    controller = AdmissionController(max_in_flight=2, max_queue=0, queue_timeout=0.1)
+
+    assert controller.acquire()
+    assert controller.acquire()
+    assert not controller.acquire()
+
+    controller.release()
+    assert controller.acquire()
+
+
+def test_queued_request_gets_released_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=2.0)
+    release, holders = hold_slots(controller, 1)
+    results = {}
+
+    waiter = start_waiter(controller, PRIORITY_NORMAL, results, 'queued')
+    wait_for_queue(controller, 1)
+    release.set()
+    waiter.join()
+    for thread in holders:
+        thread.join()
+
+    assert results == {'queued': True}
+    assert controller.stats()['in_flight'] == 0
+
+
+def test_queue_timeout_rejects():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    release, holders = hold_slots(controller, 1)
+
+    assert not controller.acquire()
+    assert controller.stats()['queued'] == 0
+
+    release.set()
+    for thread in holders:
+        thread.join()
+
+
+def test_full_queue_sheds_equal_priority_immediately():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=2.0)
+    release, holders = hold_slots(controller, 1)
+    results = {}
+
+    waiter = start_waiter(controller, PRIORITY_NORMAL, results, 'first')
+    wait_for_queue(controller, 1)
+
+    started = time.monotonic()
+    assert not controller.acquire(PRIORITY_NORMAL)
+    assert time.monotonic() - started < 0.5
+
+    release.set()
+    waiter.join()
+    for thread in holders:
+        thread.join()
+    assert results == {'first': True}
+
+
+def test_interactive_evicts_batch_from_full_queue():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=2.0)
+    release, holders = hold_slots(controller, 1)
+    results = {}
+
+    batch = start_waiter(controller, PRIORITY_BATCH, results, 'batch')
+    wait_for_queue(controller, 1)
+    interactive = start_waiter(controller, PRIORITY_INTERACTIVE, results, 'interactive')
+    batch.join(timeout=1.0)
+    assert results.get('batch') is False
+
+    release.set()
+    interactive.join()
+    for thread in holders:
+        thread.join()
+    assert results['interactive'] is True
+
+
+def test_higher_priority_waiter_is_served_first():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=2.0)
+    release, holders = hold_slots(controller, 1)
+    order = []
+
+    def waiter(priority, name):
+        if controller.acquire(priority):
+            order.append(name)
+            controller.release()
+
+    batch = threading.Thread(target=waiter, args=(PRIORITY_BATCH, 'batch'))
+    batch.start()
+    wait_for_queue(controller, 1)
+    interactive = threading.Thread(target=waiter, args=(PRIORITY_INTERACTIVE, 'interactive'))
+    interactive.start()
+    wait_for_queue(controller, 2)
+
+    release.set()
+    batch.join()
+    interactive.join()
+    for thread in holders:
+        thread.join()
+    assert order == ['interactive', 'batch']
+
+
+def test_admit_decorator_returns_503_with_retry_after():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=0.05)
+    app = flask.Flask(__name__)
+
+    @app.route('/search')
+    @controller.admit()
+    def search():
+        return 'ok'
+
+    client = app.test_client()
+    assert client.get('/search').status_code == 200
+
+    assert controller.acquire()
+    response = client.get('/search')
+    controller.release()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert response.get_json()['status'] == 'error'
+
+
+def test_async_controller_admits_up_to_max_in_flight():
+    async def main():
+        controller = AsyncAdmissionController(max_in_flight=2, max_queue=0, queue_timeout=0.05)
+        admitted = [await controller.acquire() for _ in range(3)]
+        controller.release()
+        return admitted, await controller.acquire(), controller.stats()
+
+    admitted, after_release, stats = asyncio.run(main())
+
+    assert admitted == [True, True, False]
+    assert after_release is True
+    assert stats['in_flight'] == 2
+    assert stats['rejected'] == 1
+
+
+def test_async_controller_hands_slot_to_waiter_in_order():
+    async def main():
+        controller = AsyncAdmissionController(max_in_flight=1, max_queue=2, queue_timeout=1.0)
+        order = []
+
+        async def worker(name):
+            async with controller.slot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(worker(name) for name in ('first', 'second', 'third')))
+        return order, controller.stats()
+
+    order, stats = asyncio.run(main())
+
+    assert order == ['first', 'second', 'third']
+    assert stats['in_flight'] == 0
+    assert stats['queued'] == 0
+
+
+def test_async_controller_sheds_beyond_queue_and_after_timeout():
+    async def main():
+        controller = AsyncAdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+        assert await controller.acquire()
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        # Queue is full
+        with pytest.raises(Overloaded):
+            async with controller.slot():
+                pass
+        timed_out = await queued
+        controller.release()
+        return timed_out, controller.stats()
+
+    timed_out, stats = asyncio.run(main())
+
+    assert timed_out is False
+    assert stats == {'in_flight': 0, 'queued': 0, 'admitted': 1, 'rejected': 2, 'max_in_flight': 1, 'max_queue': 1}
+
+
+def test_async_controller_drops_cancelled_waiter():
+    async def main():
+        controller = AsyncAdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1.0)
+        assert await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        controller.release()
+        return controller.stats()
+
+    assert asyncio.run(main())['in_flight'] == 0
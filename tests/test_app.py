@@ -0,0 +1,301 @@
+import asyncio
+import importlib
+import time
+
+import pytest
+from pymongo.errors import AutoReconnect, ExecutionTimeout
+
+from app.utils.deadline import CircuitBreaker
+from app.utils.singleflight import SingleFlight, AsyncSingleFlight
+from app.utils.admission import AsyncAdmissionController
+from app.analytics import tracker
+from app.search import suggest
+
+PRODUCTS = [
+    {'TITLE': 'Blue jeans', 'PRODUCT_TYPE_ID': 1, 'overall_rating': 4.5, 'prices': {'asins': 40.0}, 'score': 2.0},
+    {'TITLE': 'Blue hat', 'PRODUCT_TYPE_ID': 2, 'overall_rating': 4.0, 'prices': {'asins': 15.0}, 'score': 1.5},
+    {'TITLE': 'Red shirt', 'PRODUCT_TYPE_ID': 3, 'overall_rating': 3.5, 'prices': {'asins': 20.0}, 'score': 1.0}
+]
+
+
+class FakeCursor:
+    """
+    Text search cursor for both pymongo (iteration) and Motor (to_list).
+    A query slower than its maxTimeMS fails like MongoDB does.
+    """
+
+    def __init__(self, collection, documents):
+        self.collection = collection
+        self.documents = documents
+        self.time_limit_ms = None
+
+    def sort(self, sort_options):
+        self.documents.sort(key=lambda doc: -doc['score'])
+        return self
+
+    def limit(self, limit):
+        self.documents = self.documents[:limit]
+        return self
+
+    def max_time_ms(self, max_time_ms):
+        self.time_limit_ms = max_time_ms
+        return self
+
+    def _delay(self):
+        latency_ms = self.collection.latency_ms
+        if self.time_limit_ms is not None:
+            latency_ms = min(latency_ms, self.time_limit_ms)
+        return latency_ms / 1000.0
+
+    def _result(self):
+        self.collection.executions += 1
+        if self.collection.error:
+            raise self.collection.error
+        if self.time_limit_ms is not None and self.collection.latency_ms > self.time_limit_ms:
+            raise ExecutionTimeout('operation exceeded time limit')
+        return list(self.documents)
+
+    def __iter__(self):
+        time.sleep(self._delay())
+        return iter(self._result())
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(self._delay())
+        return self._result()
+
+
+class FakeCollection:
+    def __init__(self, documents=PRODUCTS, latency_ms=0, error=None):
+        self.documents = documents
+        self.latency_ms = latency_ms
+        self.error = error
+        self.executions = 0
+
+    def find(self, query, projection):
+        words = query['$text']['$search'].split()
+        matches = [dict(doc) for doc in self.documents
+                   if any(word in doc['TITLE'].lower().split() for word in words)]
+        return FakeCursor(self, matches)
+
+
+class FakeAnalytics:
+    """
+    search_analytics collection returning pre-aggregated popular searches
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def create_index(self, field):
+        pass
+
+    def aggregate(self, pipeline):
+        limit = next(stage['$limit'] for stage in pipeline if '$limit' in stage)
+        return FakeAggregation(self.rows[:limit])
+
+
+class FakeAggregation:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    async def to_list(self, length=None):
+        return list(self.rows)
+
+
+class FakeProducts:
+    def distinct(self, field):
+        return [product[field] for product in PRODUCTS]
+
+
+class FakeClient:
+    def server_info(self):
+        return {'version': '7.0.0'}
+
+
+class FakeMotorClient:
+    async def server_info(self):
+        return {'version': '7.0.0'}
+
+
+HEADERS = ('ETag', 'Content-Encoding', 'Vary', 'Retry-After')
+
+
+class SyncClient:
+    def __init__(self, module):
+        self.module = module
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.module.app.test_client().open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(), {h: response.headers.get(h) for h in HEADERS}
+
+    def post(self, path, body):
+        return self.request('POST', path, body)[:2]
+
+    def post_concurrently(self, path, bodies):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(len(bodies)) as pool:
+            return list(pool.map(lambda body: self.post(path, body), bodies))
+
+
+class AsyncClient:
+    def __init__(self, module):
+        self.module = module
+
+    async def _request(self, method, path, body=None, headers=None):
+        client = self.module.app.test_client()
+        if body is None:
+            response = await client.open(path, method=method, headers=headers)
+        else:
+            response = await client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, await response.get_json(), {h: response.headers.get(h) for h in HEADERS}
+
+    def request(self, method, path, body=None, headers=None):
+        return asyncio.run(self._request(method, path, body, headers))
+
+    def post(self, path, body):
+        return self.request('POST', path, body)[:2]
+
+    def post_concurrently(self, path, bodies):
+        async def run():
+            return await asyncio.gather(*(self._request('POST', path, body) for body in bodies))
+        return [(status, payload) for status, payload, _ in asyncio.run(run())]
+
+
+def load_app(name, monkeypatch, collection):
+    # Neither app may resolve the deployment's MongoDB URI from .env
+    monkeypatch.setenv('MONGODB_URI', 'mongodb://localhost:27017/?serverSelectionTimeoutMS=100')
+    if name == 'sync':
+        pytest.importorskip('flask_cors')
+        module = importlib.import_module('app.main')
+        monkeypatch.setattr(module, 'search_flight', SingleFlight())
+        client = SyncClient(module)
+    else:
+        module = importlib.import_module('app.async_main')
+        monkeypatch.setattr(module, 'search_flight', AsyncSingleFlight())
+        monkeypatch.setattr(module, 'query_admission', AsyncAdmissionController(64, 256))
+        client = AsyncClient(module)
+    monkeypatch.setattr(module, 'products_collection', collection)
+    monkeypatch.setattr(module, 'search_breaker', CircuitBreaker(failure_threshold=5, reset_seconds=60))
+    return module, client
+
+
+@pytest.fixture(params=['sync', 'async'])
+def app_name(request):
+    return request.param
+
+
+def test_short_client_deadline_does_not_blank_search_for_others(app_name, monkeypatch):
+    module, client = load_app(app_name, monkeypatch, FakeCollection(latency_ms=20))
+
+    for _ in range(5):
+        status, payload = client.post('/api/v1/search', {'query': 'blue jeans', 'timeout_ms': 1})
+        assert status == 200
+        assert payload['degraded'] is True
+
+    status, payload = client.post('/api/v1/search', {'query': 'blue hat'})
+
+    assert payload['degraded'] is False
+    assert [result['title'] for result in payload['results']] == ['Blue jeans', 'Blue hat']
+    assert module.search_breaker.stats() == {'state': 'closed', 'consecutive_failures': 0}
+
+
+def test_short_deadline_is_not_imposed_on_joined_callers(app_name, monkeypatch):
+    collection = FakeCollection(latency_ms=50)
+    module, client = load_app(app_name, monkeypatch, collection)
+
+    bodies = [{'query': 'blue jeans', 'timeout_ms': 1}] + [{'query': 'blue jeans'}] * 4
+    payloads = client.post_concurrently('/api/v1/search', bodies)
+
+    assert [payload['degraded'] for _, payload in payloads] == [True, False, False, False, False]
+    assert module.search_breaker.stats()['consecutive_failures'] == 0
+
+
+def test_shared_execution_records_one_breaker_outcome(app_name, monkeypatch):
+    collection = FakeCollection(latency_ms=50, error=AutoReconnect('connection reset'))
+    module, client = load_app(app_name, monkeypatch, collection)
+
+    payloads = client.post_concurrently('/api/v1/search', [{'query': 'blue jeans'}] * 4)
+
+    assert all(payload['degraded'] for _, payload in payloads)
+    assert collection.executions == 1
+    assert module.search_breaker.stats() == {'state': 'closed', 'consecutive_failures': 1}
+
+
+def test_connection_errors_open_breaker(app_name, monkeypatch):
+    collection = FakeCollection(error=AutoReconnect('connection reset'))
+    module, client = load_app(app_name, monkeypatch, collection)
+
+    for n in range(5):
+        client.post('/api/v1/search', {'query': f'blue {n}'})
+    collection.error = None
+    status, payload = client.post('/api/v1/search', {'query': 'blue hat'})
+
+    assert module.search_breaker.state == CircuitBreaker.OPEN
+    assert payload['degraded'] is True
+    assert collection.executions == 5
+
+
+POPULAR = [
+    {'_id': 'blue jeans', 'count': 12, 'avg_results': 8.5},
+    {'_id': 'red shirt', 'count': 7, 'avg_results': 3.0},
+    {'_id': 'hat', 'count': 2, 'avg_results': None}
+]
+
+PARITY_REQUESTS = [
+    ('GET', '/', None, None),
+    ('POST', '/api/v1/search', {'query': 'Blue jeans'}, None),
+    ('POST', '/api/v1/search', {'query': 'blue'}, {'Accept-Encoding': 'gzip'}),
+    ('POST', '/api/v1/search', {'query': 'the'}, None),
+    ('POST', '/api/v1/search', {'query': 'blue', 'timeout_ms': 'soon'}, None),
+    ('POST', '/api/v1/search', {'text': 'blue'}, None),
+    ('GET', '/api/v1/suggest?q=blu', None, None),
+    ('GET', '/api/v1/suggest?q=r&limit=2', None, None),
+    ('GET', '/api/v1/suggest', None, None),
+    ('GET', '/api/v1/health', None, None),
+    ('GET', '/api/v1/analytics/popular?limit=2', None, None),
+    ('GET', '/api/v1/analytics/popular?hours=0', None, None)
+]
+
+
+def test_sync_and_async_responses_are_identical(monkeypatch):
+    db = {'products': FakeProducts(), 'search_analytics': FakeAnalytics(POPULAR)}
+    monkeypatch.setattr(suggest, 'get_db', lambda: db)
+    monkeypatch.setattr(suggest, 'PREFIX_REBUILD_SECONDS', 0)
+    monkeypatch.setattr(suggest, 'PREFIX_TABLE_PATH', None)
+    monkeypatch.setattr(tracker, 'get_db', lambda: db)
+    suggester = suggest.SearchSuggester()
+
+    sync_module, sync_client = load_app('sync', monkeypatch, FakeCollection())
+    monkeypatch.setattr(sync_module, 'client', FakeClient())
+    monkeypatch.setattr(sync_module, '_suggester', suggester)
+    monkeypatch.setattr(sync_module, '_analytics', tracker.SearchAnalytics())
+
+    async_module, async_client = load_app('async', monkeypatch, FakeCollection())
+    monkeypatch.setattr(async_module, 'client', FakeMotorClient())
+    monkeypatch.setattr(async_module, '_suggester', suggester)
+    monkeypatch.setattr(async_module, 'analytics_collection', db['search_analytics'])
+
+    for method, path, body, headers in PARITY_REQUESTS:
+        # A cross-origin request, so both CORS extensions vary on Origin
+        headers = dict(headers or {}, Origin='http://localhost:3000')
+        sync_response = sync_client.request(method, path, body, headers)
+        async_response = async_client.request(method, path, body, headers)
+        assert sync_response == async_response, (method, path, body)
+        assert sync_response[0] in (200, 400)
+
+
+def test_async_mode_sheds_queries_beyond_admission_limit(monkeypatch):
+    module, client = load_app('async', monkeypatch, FakeCollection(latency_ms=50))
+    monkeypatch.setattr(module, 'query_admission', AsyncAdmissionController(1, 1, queue_timeout=1.0))
+
+    bodies = [{'query': f'blue {n}'} for n in range(3)]
+    responses = client.post_concurrently('/api/v1/search', bodies)
+
+    assert sorted(status for status, _ in responses) == [200, 200, 503]
+    shed = next(payload for status, payload in responses if status == 503)
+    assert shed == {'error': 'Service overloaded, retry later', 'status': 'error'}
+    # Shedding is load, not a database failure
+    assert module.search_breaker.stats()['consecutive_failures'] == 0
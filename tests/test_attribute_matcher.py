@@ -0,0 +1,61 @@
+import json
+
+from app.utils import attribute_matcher
+from app.utils import text_utils
+from app.utils.attribute_matcher import AttributeMatcher, DEFAULT_ATTRIBUTES, load_dictionary
+
+
+def test_leftmost_longest_match_wins():
+    matcher = AttributeMatcher({'color': ['blue', 'navy blue', 'navy'], 'size': ['blue whale']})
+
+    hits = matcher.find_all('Navy Blue whale shirt')
+
+    assert [(attribute, term) for _, _, attribute, term in hits] == [('color', 'navy blue')]
+
+
+def test_overlapping_terms_prefer_leftmost_start():
+    matcher = AttributeMatcher({'material': ['stainless steel'], 'color': ['steel blue']})
+
+    assert matcher.extract('stainless steel blue bottle') == {'material': ['stainless steel']}
+
+
+def test_matches_only_on_word_boundaries():
+    matcher = AttributeMatcher({'color': ['red', 'tan'], 'brand': ['lg']})
+
+    assert matcher.extract('tangled bored lgx') == {}
+    assert matcher.extract('red, tan-lg') == {'color': ['red', 'tan'], 'brand': ['lg']}
+
+
+def test_extract_groups_terms_in_query_order_without_duplicates():
+    matcher = AttributeMatcher(DEFAULT_ATTRIBUTES)
+
+    found = matcher.extract('Red  nike   shoes, red or  sky blue, XL')
+
+    assert found == {'color': ['red', 'sky blue'], 'brand': ['nike'], 'size': ['xl']}
+
+
+def test_bad_dictionary_file_falls_back_to_default(tmp_path):
+    broken = tmp_path / 'attributes.json'
+    broken.write_text('{"color": [', encoding='utf-8')
+
+    assert load_dictionary(str(broken)) == DEFAULT_ATTRIBUTES
+    assert load_dictionary(str(tmp_path / 'missing.json')) == DEFAULT_ATTRIBUTES
+
+
+def test_dictionary_file_is_loaded(tmp_path):
+    path = tmp_path / 'attributes.json'
+    path.write_text(json.dumps({'color': ['Mauve']}), encoding='utf-8')
+
+    assert AttributeMatcher(load_dictionary(str(path))).extract('mauve scarf') == {'color': ['mauve']}
+
+
+def test_dictionary_cannot_overwrite_reserved_fields(monkeypatch):
+    matcher = AttributeMatcher({'color': ['red'], 'terms': ['red'], 'price_range': ['cheap'], 'style': ['boho']})
+    monkeypatch.setattr(attribute_matcher, '_matcher', matcher)
+
+    attributes = text_utils.extract_product_attributes('cheap red boho dress')
+
+    assert attributes['color'] == 'red'
+    assert attributes['price_range'] is None
+    assert 'style' not in attributes
+    assert attributes['terms'] == {'color': ['red'], 'price_range': ['cheap'], 'style': ['boho']}
@@ -0,0 +1,119 @@
+import time
+
+from pymongo.errors import AutoReconnect, ExecutionTimeout, OperationFailure
+
+from app.utils.deadline import Deadline, CircuitBreaker, DEFAULT_TIMEOUT_MS, is_database_failure
+
+
+def test_deadline_counts_down_and_expires():
+    deadline = Deadline(50)
+
+    assert 0 < deadline.remaining_ms() <= 50
+    assert not deadline.expired()
+
+    time.sleep(0.06)
+
+    assert deadline.expired()
+    assert deadline.remaining_ms() == 0
+    # maxTimeMS=0 would mean "no limit" to MongoDB
+    assert deadline.max_time_ms() == 1
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_single_probe_after_reset_window():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe per window
+    assert not breaker.allow()
+
+
+def test_probe_success_closes_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_probe_failure_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_failures_while_open_do_not_delay_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.1)
+    breaker.record_failure()
+
+    # Late failures from requests that started before the breaker opened
+    time.sleep(0.06)
+    breaker.record_failure()
+    time.sleep(0.05)
+
+    assert breaker.allow()
+
+
+def test_unreported_probe_does_not_wedge_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    # The probe never reports back; another one goes out next window
+    time.sleep(0.06)
+
+    assert breaker.allow()
+
+
+def test_shortened_deadline():
+    assert not Deadline().shortened
+    assert Deadline(DEFAULT_TIMEOUT_MS).shortened is False
+    assert Deadline(1).shortened
+
+
+def test_only_database_failures_count_against_breaker():
+    full, short = Deadline(), Deadline(1)
+
+    assert is_database_failure(AutoReconnect('connection reset'), short)
+    assert is_database_failure(ExecutionTimeout('operation exceeded time limit'), full)
+    # The client's own short budget running out says nothing about MongoDB
+    assert not is_database_failure(ExecutionTimeout('operation exceeded time limit'), short)
+    assert not is_database_failure(OperationFailure('text index required'), full)
@@ -0,0 +1,103 @@
+import pytest
+
+from app.search import suggest as suggest_module
+from app.search.prefix_table import build_prefix_table, normalize_prefix, _prefixes
+from app.search.suggest import SearchSuggester
+
+
+class FakeProducts:
+    def __init__(self, titles, categories):
+        self.values = {'TITLE': titles, 'PRODUCT_TYPE_ID': categories}
+
+    def distinct(self, field):
+        return self.values[field]
+
+
+class FakeAnalytics:
+    def __init__(self, query_counts):
+        self.query_counts = query_counts
+
+    def aggregate(self, pipeline):
+        return [{'_id': query, 'count': count} for query, count in self.query_counts.items()]
+
+
+def test_normalize_prefix():
+    assert normalize_prefix('  Blue-Jeans  XL! ') == 'bluejeans xl'
+    assert normalize_prefix(42) == '42'
+
+
+def test_prefixes_cover_whole_text_and_each_word():
+    assert list(_prefixes('red hat', 3)) == ['r', 're', 'red', 'h', 'ha', 'hat']
+    assert list(_prefixes('aa a', 2)) == ['a', 'aa']
+
+
+def test_searched_queries_rank_above_catalog_entries():
+    table = build_prefix_table(['Blue Velvet Sofa'], [], {'blue jeans': 100, 'blue hat': 3})
+
+    assert [s['text'] for s in table['blu']] == ['blue jeans', 'blue hat', 'Blue Velvet Sofa']
+    assert [s['type'] for s in table['blu']] == ['popular', 'popular', 'product']
+
+
+def test_searched_catalog_entry_outranks_unsearched_one():
+    table = build_prefix_table(['Red Hat', 'Red Dress'], [], {'red hat': 1, 'red shoes': 50})
+
+    assert [s['text'] for s in table['red']] == ['red shoes', 'Red Hat', 'Red Dress']
+
+
+def test_query_matching_catalog_entry_is_suggested_once():
+    table = build_prefix_table(['Shirt'], ['shoes'], {'shoes': 5, 'shirt': 2})
+
+    assert [(s['type'], s['text']) for s in table['sh']] == [('category', 'Category: shoes'), ('product', 'Shirt')]
+
+
+def test_table_keeps_top_k_per_prefix():
+    titles = [f'Lamp {n}' for n in range(10)]
+
+    table = build_prefix_table(titles, [], {}, max_prefix_len=2, top_k=3)
+
+    assert len(table['la']) == 3
+    assert 'lam' not in table
+
+
+def make_suggester(monkeypatch, titles, categories, query_counts):
+    db = {'products': FakeProducts(titles, categories), 'search_analytics': FakeAnalytics(query_counts)}
+    monkeypatch.setattr(suggest_module, 'get_db', lambda: db)
+    monkeypatch.setattr(suggest_module, 'PREFIX_TABLE_PATH', None)
+    monkeypatch.setattr(suggest_module, 'PREFIX_REBUILD_SECONDS', 0)
+    return SearchSuggester()
+
+
+def test_short_prefix_is_answered_from_table(monkeypatch):
+    suggester = make_suggester(monkeypatch, ['Blue Jeans', 'Red Hat'], [], {'blue jeans': 4})
+    monkeypatch.setattr(suggester, '_get_title_suggestions', lambda *args: pytest.fail('fuzzy path used'))
+
+    suggestions = suggester.get_suggestions('Blu', limit=2)
+
+    assert [s['text'] for s in suggestions] == ['Blue Jeans']
+
+
+def test_long_prefix_and_large_limit_use_fuzzy_matching(monkeypatch):
+    suggester = make_suggester(monkeypatch, ['Blue Jeans', 'Red Hat'], [], {})
+    monkeypatch.setattr(suggest_module, 'preprocess_text', str.split)
+    fuzzy_calls = []
+    original = suggester._get_title_suggestions
+
+    def title_suggestions(query, limit):
+        fuzzy_calls.append(query)
+        return original(query, limit)
+
+    monkeypatch.setattr(suggester, '_get_title_suggestions', title_suggestions)
+
+    suggestions = suggester.get_suggestions('blue jean', limit=2)
+    suggester.get_suggestions('re', limit=suggester.prefix_table.top_k + 1)
+
+    assert suggestions[0]['text'] == 'Blue Jeans'
+    assert fuzzy_calls == ['blue jean', 're']
+
+
+def test_fuzzy_path_is_used_until_table_is_built(monkeypatch):
+    suggester = make_suggester(monkeypatch, ['Blue Jeans'], [], {})
+    suggester.prefix_table.table = None
+    monkeypatch.setattr(suggest_module, 'preprocess_text', str.split)
+
+    assert [s['text'] for s in suggester.get_suggestions('blue', limit=1)] == ['Blue Jeans']
@@ -0,0 +1,87 @@
+import cProfile
+import json
+import pstats
+import threading
+import time
+
+import flask
+
+from app.utils import profiling
+
+
+def compile_as(filename, source):
+    """Define functions whose code objects report `filename` as their source"""
+    namespace = {'time': time}
+    exec(compile(source, filename, 'exec'), namespace)
+    return namespace
+
+
+def test_builtin_wait_is_attributed_to_calling_component():
+    fake_pymongo = compile_as('/site-packages/pymongo/network.py', (
+        'def receive_message():\n'
+        '    time.sleep(0.05)\n'
+    ))
+    profiler = cProfile.Profile()
+    profiler.enable()
+    fake_pymongo['receive_message']()
+    profiler.disable()
+
+    components = profiling._component_times(pstats.Stats(profiler))
+
+    assert components['mongo'] >= 40
+    assert components['other'] < 10
+
+
+def test_get_profile_falls_back_to_profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    report = {'id': 'a' * 32, 'wall_ms': 1.0}
+    (tmp_path / f"{report['id']}.json").write_text(json.dumps(report), encoding='utf-8')
+
+    assert profiling.get_profile(report['id']) == report
+    assert profiling.get_profile('b' * 32) is None
+    assert profiling.get_profile('../' + 'a' * 32) is None
+
+
+def profiled_app(monkeypatch, work=lambda: time.sleep(0.01)):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 'secret')
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', None)
+    app = flask.Flask(__name__)
+
+    @app.route('/search')
+    @profiling.profiled
+    def search():
+        work()
+        return flask.jsonify(status='success')
+
+    return app
+
+
+def test_profiled_request_gets_report_id(monkeypatch):
+    client = profiled_app(monkeypatch).test_client()
+
+    response = client.get('/search', headers={'X-Profile': 'secret'})
+
+    assert response.status_code == 200
+    assert profiling.get_profile(response.headers['X-Profile-Id'])['endpoint'] == '/search'
+    assert 'X-Profile-Id' not in client.get('/search').headers
+
+
+def test_concurrent_profiled_requests_are_served(monkeypatch):
+    # Every request is inside the view at once
+    inside = threading.Barrier(4, timeout=5)
+    app = profiled_app(monkeypatch, work=inside.wait)
+    responses = []
+
+    def run():
+        responses.append(app.test_client().get('/search', headers={'X-Profile': 'secret'}))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [200] * 4
+    assert all(response.get_json() == {'status': 'success'} for response in responses)
+    # Requests that found the profiler busy went through unprofiled
+    assert sum('X-Profile-Id' in response.headers for response in responses) == 1
@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timedelta
+
+from app.analytics.replay import TrafficReplayer, percentile, export_events, load_events_from_file
+
+
+class FakeResponse:
+    status_code = 200
+    ok = True
+
+    def __init__(self, total):
+        self.total = total
+
+    def json(self):
+        return {'total': self.total}
+
+
+class FakeSession:
+    def __init__(self, delay=0.0, totals=None):
+        self.delay = delay
+        self.totals = totals or {}
+
+    def post(self, url, json, timeout):
+        time.sleep(self.delay)
+        return FakeResponse(self.totals.get(json['query'], 0))
+
+
+def make_events(count, gap_seconds=0):
+    start = datetime(2024, 5, 1, 10, 0)
+    return [{
+        'timestamp': start + timedelta(seconds=n * gap_seconds),
+        'query': f'query {n}',
+        'filters': {'color': 'blue'} if n % 2 else None,
+        'results_count': 3
+    } for n in range(count)]
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert percentile(list(range(1, 151)), 99) == 149
+    assert percentile(list(range(1, 11)), 90) == 9
+    assert percentile(list(range(1, 11)), 100) == 10
+    assert percentile([7], 1) == 7
+    assert percentile([], 50) is None
+
+
+def test_export_and_load_round_trip(tmp_path):
+    events = make_events(3, gap_seconds=5)
+    path = tmp_path / 'window.jsonl'
+
+    export_events(list(reversed(events)), str(path))
+
+    assert load_events_from_file(str(path)) == events
+
+
+def test_report_summarizes_samples():
+    replayer = TrafficReplayer('http://localhost:8000/')
+    replayer.samples = [{
+        'query': f'q{n}', 'latency_ms': float(n), 'service_ms': n / 2.0, 'lag_ms': 0.0,
+        'recorded_count': 3, 'count': 3 if n != 4 else 5,
+        'status': 200 if n != 5 else None, 'error': 'timeout' if n == 5 else None
+    } for n in range(1, 6)]
+
+    report = replayer.report(2.0)
+
+    assert replayer.url == 'http://localhost:8000/api/v1/search'
+    assert report['requests'] == 5
+    assert report['throughput_rps'] == 2.5
+    assert report['errors'] == 1
+    assert report['status_codes'] == {200: 4}
+    assert report['latency_ms']['p50'] == 3.0
+    assert report['latency_ms']['max'] == 5.0
+    assert report['service_ms']['p50'] == 1.5
+    assert report['result_count_diffs'] == 1
+    assert report['result_count_diff_examples'] == [{'query': 'q4', 'recorded': 3, 'replayed': 5}]
+
+
+def test_latency_includes_time_queued_for_a_worker():
+    replayer = TrafficReplayer('http://localhost:8000', speed=0, concurrency=1)
+    session = FakeSession(delay=0.02)
+    replayer._session = lambda: session
+
+    report = replayer.run(make_events(4))
+
+    assert report['requests'] == 4
+    # The last request waited for the three before it on the single worker
+    assert report['latency_ms']['max'] >= 60
+    assert report['service_ms']['max'] < report['latency_ms']['max']
@@ -0,0 +1,83 @@
+import gzip
+
+import brotli
+from werkzeug.http import parse_accept_header, parse_etags
+
+from app.utils import response
+from app.utils.response import choose_encoding, encode_json, make_etag, render_json
+
+LARGE = {'results': [{'title': f'Blue shirt {n}', 'price': n} for n in range(200)], 'status': 'success'}
+SMALL = {'status': 'success'}
+
+
+def render(payload, accept_encoding='', if_none_match='', status=200):
+    return render_json(payload, status, parse_accept_header(accept_encoding), parse_etags(if_none_match))
+
+
+def test_choose_encoding_honours_quality_values():
+    assert choose_encoding({'br': 0.1, 'gzip': 1.0}, 5000) == 'gzip'
+    assert choose_encoding({'gzip': 1.0, 'br': 1.0}, 5000) == 'br'
+    assert choose_encoding({'*': 1.0}, 5000) == 'br'
+    assert choose_encoding({'br': 0, '*': 0.5}, 5000) == 'gzip'
+    assert choose_encoding({'gzip': 0}, 5000) is None
+    assert choose_encoding({'gzip': 0.5, 'identity': 1.0}, 5000) is None
+    assert choose_encoding({}, 5000) is None
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(response, 'brotli', None)
+
+    assert choose_encoding({'br': 1.0, 'gzip': 0.5}, 5000) == 'gzip'
+    assert choose_encoding({'br': 1.0}, 5000) is None
+
+
+def test_small_bodies_are_sent_uncompressed():
+    body, status, headers = render(SMALL, 'br, gzip')
+
+    assert status == 200
+    assert body == encode_json(SMALL)
+    assert 'Content-Encoding' not in headers
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert headers['ETag'] == make_etag(body)
+
+
+def test_large_bodies_are_compressed_with_negotiated_coding():
+    raw = encode_json(LARGE)
+
+    br_body, _, br_headers = render(LARGE, 'gzip, br')
+    gzip_body, _, gzip_headers = render(LARGE, 'br;q=0.1, gzip;q=1.0')
+
+    assert br_headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(br_body) == raw
+    assert gzip_headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzip_body) == raw
+    assert gzip_headers['Vary'] == 'Accept-Encoding'
+
+
+def test_each_coding_gets_its_own_etag():
+    _, _, br_headers = render(LARGE, 'br')
+    _, _, gzip_headers = render(LARGE, 'gzip')
+    _, _, plain_headers = render(LARGE)
+
+    assert len({br_headers['ETag'], gzip_headers['ETag'], plain_headers['ETag']}) == 3
+    assert br_headers['ETag'].endswith('-br"')
+
+
+def test_if_none_match_returns_304_with_weak_comparison():
+    _, _, headers = render(LARGE, 'gzip')
+    etag = headers['ETag']
+
+    assert render(LARGE, 'gzip', etag)[:2] == (b'', 304)
+    assert render(LARGE, 'gzip', f'W/{etag}')[:2] == (b'', 304)
+    assert render(LARGE, 'gzip', f'"other", {etag}')[1] == 304
+    # A validator for another coding doesn't match this representation
+    assert render(LARGE, 'br', etag)[1] == 200
+    assert render({'status': 'changed'}, 'gzip', etag)[1] == 200
+
+
+def test_error_responses_have_no_etag():
+    body, status, headers = render({'status': 'error'}, if_none_match='*', status=500)
+
+    assert status == 500
+    assert 'ETag' not in headers
+    assert body == encode_json({'status': 'error'})
@@ -0,0 +1,152 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from app.search.scatter import ScatterGatherSearcher, partition_for
+from app.utils.singleflight import SingleFlight
+from app.utils.deadline import CircuitBreaker
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, sort_options):
+        # Tests only sort by text score, descending
+        self.documents = sorted(self.documents, key=lambda doc: -doc['score'])
+        return self
+
+    def limit(self, limit):
+        self.documents = self.documents[:limit]
+        return self
+
+    def max_time_ms(self, max_time_ms):
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+
+class FakeCollection:
+    """
+    Stands in for one partition's products collection
+    """
+
+    def __init__(self, db_name, documents, find_delay=0, count_delay=0):
+        self.database = SimpleNamespace(name=db_name)
+        self.name = 'products'
+        self.documents = documents
+        self.find_delay = find_delay
+        self.count_delay = count_delay
+
+    def find(self, query, projection):
+        time.sleep(self.find_delay)
+        return FakeCursor(list(self.documents))
+
+    def count_documents(self, query, maxTimeMS=None):
+        time.sleep(self.count_delay)
+        return len(self.documents)
+
+
+def make_partitions(count=3, size=5, **delays):
+    return [
+        FakeCollection(f'catalog_{index}', [
+            {'TITLE': f'p{index}-{item}', 'score': float((index * 7 + item * 3) % 10)}
+            for item in range(size)
+        ], **delays)
+        for index in range(count)
+    ]
+
+
+def make_searcher(partitions, **kwargs):
+    kwargs.setdefault('partition_timeout_ms', 500)
+    kwargs.setdefault('allow_partial', True)
+    return ScatterGatherSearcher(
+        partitions, flight=SingleFlight(), breaker=CircuitBreaker(), **kwargs
+    )
+
+
+def query(text='shirt'):
+    return {'tokens': [text], 'attributes': {}, 'filters': {}}
+
+
+def test_merges_partitions_in_global_score_order():
+    partitions = make_partitions()
+    searcher = make_searcher(partitions)
+    all_scores = sorted((doc['score'] for p in partitions for doc in p.documents), reverse=True)
+
+    first = searcher.search(query(), page=1, page_size=4)
+    second = searcher.search(query(), page=2, page_size=4)
+
+    assert [r['text_score'] for r in first['results']] == all_scores[:4]
+    assert [r['text_score'] for r in second['results']] == all_scores[4:8]
+    assert first['total'] == 15
+    assert first['total_exact'] is True
+    assert first['partial'] is False
+
+
+def test_slow_partition_is_dropped_when_partial_allowed():
+    partitions = make_partitions()
+    partitions.append(FakeCollection('catalog_slow', [{'TITLE': 'slow', 'score': 99.0}], find_delay=1.0))
+    searcher = make_searcher(partitions, partition_timeout_ms=200)
+
+    result = searcher.search(query(), page=1, page_size=4)
+
+    assert result['partial'] is True
+    assert result['failed_partitions'] == ['catalog_slow.products']
+    assert 'slow' not in [r['title'] for r in result['results']]
+    assert len(result['results']) == 4
+    assert result['total_exact'] is False
+
+
+def test_slow_partition_degrades_when_partial_not_allowed():
+    partitions = make_partitions()
+    partitions.append(FakeCollection('catalog_slow', [], find_delay=1.0))
+    searcher = make_searcher(partitions, partition_timeout_ms=200, allow_partial=False)
+
+    result = searcher.search(query(), page=1, page_size=4)
+
+    assert result['results'] == []
+    assert result['degraded'] is True
+
+
+def test_slow_count_keeps_hits_with_lower_bound_total():
+    partitions = make_partitions(count=2)
+    partitions.append(FakeCollection('catalog_2', [{'TITLE': 'best', 'score': 50.0}], count_delay=1.0))
+    searcher = make_searcher(partitions, partition_timeout_ms=200)
+
+    result = searcher.search(query(), page=1, page_size=3)
+
+    assert result['partial'] is False
+    assert result['results'][0]['title'] == 'best'
+    assert result['total_exact'] is False
+    assert result['total'] == 11
+
+
+def test_concurrent_searches_are_not_timed_out_by_queueing():
+    # Pool sized for one search at a time; four searches queue behind it
+    partitions = make_partitions(find_delay=0.3)
+    searcher = make_searcher(partitions, partition_timeout_ms=500, concurrency=1)
+    results = []
+
+    def run(text):
+        results.append(searcher.search(query(text), page=1, page_size=4))
+
+    threads = [threading.Thread(target=run, args=(f'query{n}',)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert all(result['partial'] is False for result in results)
+    assert all(result['total_exact'] is True for result in results)
+    assert searcher.breaker.stats()['consecutive_failures'] == 0
+
+
+def test_partition_for_is_stable():
+    product = {'_id': 'abc', 'PRODUCT_TYPE_ID': 42}
+
+    assert partition_for(product, 4) == partition_for(dict(product), 4)
+    assert partition_for(product, 4, by='category') == partition_for({'PRODUCT_TYPE_ID': 42}, 4, by='category')
+    assert 0 <= partition_for(product, 4) < 4
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from pymongo.errors import AutoReconnect, ExecutionTimeout
+
+from app.search import searcher as searcher_module
+from app.search.searcher import ProductSearcher
+from app.utils.singleflight import SingleFlight
+from app.utils.deadline import CircuitBreaker
+
+
+class FakeCursor:
+    def __init__(self, documents, find_error=None):
+        self.documents = documents
+        self.find_error = find_error
+
+    def sort(self, sort_options):
+        return self
+
+    def skip(self, skip):
+        self.documents = self.documents[skip:]
+        return self
+
+    def limit(self, limit):
+        self.documents = self.documents[:limit]
+        return self
+
+    def max_time_ms(self, max_time_ms):
+        return self
+
+    def __iter__(self):
+        if self.find_error:
+            raise self.find_error
+        return iter(self.documents)
+
+
+class FakeCollection:
+    def __init__(self, documents, find_error=None, count_error=None, find_delay=0):
+        self.documents = documents
+        self.find_error = find_error
+        self.count_error = count_error
+        self.find_delay = find_delay
+        self.finds = 0
+
+    def find(self, query, projection):
+        self.finds += 1
+        time.sleep(self.find_delay)
+        return FakeCursor(list(self.documents), self.find_error)
+
+    def count_documents(self, query, maxTimeMS=None):
+        if self.count_error:
+            raise self.count_error
+        return len(self.documents)
+
+
+DOCUMENTS = [{'TITLE': f'Blue shirt {n}', 'score': 10.0 - n} for n in range(5)]
+
+
+def make_searcher(monkeypatch, collection):
+    monkeypatch.setattr(searcher_module, 'get_db', lambda: {'products': collection})
+    return ProductSearcher(flight=SingleFlight(), breaker=CircuitBreaker(failure_threshold=1))
+
+
+def query():
+    return {'tokens': ['blue', 'shirt'], 'attributes': {}, 'filters': {}}
+
+
+def test_short_client_budget_timeout_degrades_without_tripping_breaker(monkeypatch):
+    searcher = make_searcher(monkeypatch, FakeCollection(DOCUMENTS, find_error=ExecutionTimeout('time limit')))
+
+    result = searcher.search(query(), timeout_ms=1)
+
+    assert result['degraded'] is True
+    assert result['results'] == []
+    assert searcher.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_short_client_budget_count_timeout_keeps_breaker_closed(monkeypatch):
+    searcher = make_searcher(monkeypatch, FakeCollection(DOCUMENTS, count_error=ExecutionTimeout('time limit')))
+
+    result = searcher.search(query(), page_size=2, timeout_ms=50)
+
+    assert len(result['results']) == 2
+    assert result['total_exact'] is False
+    assert searcher.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_full_budget_timeout_trips_breaker(monkeypatch):
+    searcher = make_searcher(monkeypatch, FakeCollection(DOCUMENTS, find_error=ExecutionTimeout('time limit')))
+
+    searcher.search(query())
+
+    assert searcher.breaker.state == CircuitBreaker.OPEN
+
+
+def test_connection_error_trips_breaker_under_any_budget(monkeypatch):
+    searcher = make_searcher(monkeypatch, FakeCollection(DOCUMENTS, find_error=AutoReconnect('reset')))
+
+    searcher.search(query(), timeout_ms=1)
+
+    assert searcher.breaker.state == CircuitBreaker.OPEN
+
+
+def test_callers_with_different_budgets_do_not_share_execution(monkeypatch):
+    collection = FakeCollection(DOCUMENTS, find_delay=0.1)
+    searcher = make_searcher(monkeypatch, collection)
+    results = []
+
+    def run(timeout_ms):
+        results.append(searcher.search(query(), timeout_ms=timeout_ms))
+
+    threads = [threading.Thread(target=run, args=(timeout_ms,)) for timeout_ms in (50, None, None)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert collection.finds == 2
+    assert searcher.get_coalescing_stats()['coalesced'] == 1
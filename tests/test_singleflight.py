@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.utils.singleflight import SingleFlight, AsyncSingleFlight
+
+
+def run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_search():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'total': 3}
+
+    run_concurrently(8, lambda: results.append(flight.do('red shirt', slow_search)))
+
+    assert len(calls) == 1
+    assert results == [{'total': 3}] * 8
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {'executed': 1, 'coalesced': 7, 'in_flight': 0}
+
+
+def test_exception_propagates_to_every_waiter():
+    flight = SingleFlight()
+    errors = []
+
+    def failing_search():
+        time.sleep(0.2)
+        raise RuntimeError('mongo down')
+
+    def call():
+        try:
+            flight.do('key', failing_search)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    run_concurrently(5, call)
+
+    assert errors == ['mongo down'] * 5
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.stats() == {'executed': 2, 'coalesced': 0, 'in_flight': 0}
+
+
+def test_key_is_released_after_completion():
+    flight = SingleFlight()
+    calls = []
+
+    def search():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do('key', search) == 1
+    assert flight.do('key', search) == 2
+
+
+def test_key_is_released_after_failure():
+    flight = SingleFlight()
+
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: (_ for _ in ()).throw(ValueError('bad')))
+
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_async_callers_share_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow_search():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'total': 3}
+
+    async def main():
+        return await asyncio.gather(*(flight.do('red shirt', slow_search) for _ in range(5)))
+
+    assert asyncio.run(main()) == [{'total': 3}] * 5
+    assert len(calls) == 1
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_cancelled_async_leader_does_not_cancel_followers():
+    flight = AsyncSingleFlight()
+
+    async def slow_search():
+        await asyncio.sleep(0.05)
+        return {'total': 3}
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do('red shirt', slow_search))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('red shirt', slow_search))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == {'total': 3}
+    assert flight.stats() == {'executed': 1, 'coalesced': 1, 'in_flight': 0}